@@ -24,35 +24,11 @@ import sys
 import time
 import argparse
 
-def read_instance(filename):
-    """
-    Read the Minimum Set Cover Problem instance from the given file.
-    
-    The file format is expected to be:
-    - First line: n m (n = number of elements in universe, m = number of subsets)
-    - Next m lines: size elem1 elem2 ... elemSize (each representing a subset)
-    
-    Args:
-        filename (str): Path to the instance file
-        
-    Returns:
-        tuple: (universe, subsets)
-            - universe: A set of all elements (integers from 1 to n)
-            - subsets: A list of sets, where each set is a subset of the universe
-    """
-    with open(filename, 'r') as f:
-        n, m = map(int, f.readline().strip().split())
-        subsets = []
-        for _ in range(m):
-            line = list(map(int, f.readline().strip().split()))
-            size = line[0]
-            subset = set(line[1:size+1])
-            subsets.append(subset)
-    
-    universe = set(range(1, n+1))
-    return universe, subsets
-
-def greedy_set_cover(universe, subsets):
+import numpy as np
+
+from instance import read_instance
+
+def greedy_set_cover(instance, stats=None):
     """
     Implements a greedy approximation algorithm for the Minimum Set Cover problem.
     
@@ -65,10 +41,23 @@ def greedy_set_cover(universe, subsets):
     This is a polynomial-time algorithm that achieves an approximation ratio of H(d),
     where H(d) is the d-th harmonic number and d is the size of the largest subset.
     In the worst case, this gives an O(log n) approximation.
+
+    Rather than rescanning every subset on each pick, the subsets are visited
+    level by level: at gain level L, the subsets whose gain is L are taken in
+    index order, and each is picked if it still has gain L when its turn comes.
+    Gains only decrease and L is the largest gain left, so this picks the
+    largest gain with ties towards the smallest index, exactly as a linear scan.
+    A subset can only have gain L if its size is at least L, so each level only
+    looks at the subsets that large (O(nnz) over all levels). The instance's
+    element -> subsets index is used to decrement only the gains of subsets
+    touching newly covered elements. All state is in NumPy arrays (no Python
+    object per subset), which keeps memory-mapped runs (exec.py -mmap) small.
     
     Args:
-        universe (set): A set of all elements (the universe U)
-        subsets (list): A list of sets, where each set is a subset of the universe
+        instance (Instance): The set cover instance
+        stats (dict, optional): Receives the number of greedy steps and of
+            candidates skipped because their gain had dropped, and the time
+            spent on coverage and gain updates
     
     Returns:
         tuple: (solution, time_spent)
@@ -76,47 +65,60 @@ def greedy_set_cover(universe, subsets):
             - time_spent: The time spent executing the algorithm, in seconds
     """
     start_time = time.time()
-    # Elements that still need to be covered
-    elements_remaining = set(universe)
-    
+
+    # Marginal gain of each subset (number of uncovered elements it covers)
+    gain = instance.subset_sizes.copy()
+
+    # Subsets by decreasing size (ties: index), and the number of subsets of
+    # size at least L for every L: the only candidates at gain level L
+    by_size = np.argsort(-gain, kind='stable')
+    at_least = np.cumsum(np.bincount(gain)[::-1])[::-1] if len(gain) else np.zeros(1, dtype=np.int64)
+
+    covered = np.zeros(instance.n, dtype=bool)
+    elements_remaining = instance.n
+
     # Indices of the chosen subsets (0-indexed)
     solution = []
-    
+
+    stale = 0
+    update_time = 0.0
+    timed = stats is not None
+
     # Continue until all elements are covered
-    while elements_remaining:
-        # Find the subset that covers the most uncovered elements
-        best_subset_index = -1
-        best_subset_coverage = -1
-        
-        for i, subset in enumerate(subsets):
-            # Skip if this subset is already in our solution
-            if i in solution:
+    level = len(at_least) - 1
+    while elements_remaining and level > 0:
+        prefix = by_size[:at_least[level]]
+        candidates = np.sort(prefix[gain[prefix] == level])
+        for best_subset_index in candidates.tolist():
+            # Gains only ever decrease: a candidate below the level is left for a later level
+            if gain[best_subset_index] != level:
+                stale += 1
                 continue
-            
-            # Calculate how many new elements this subset would cover
-            # by finding the intersection with remaining uncovered elements
-            coverage = len(subset.intersection(elements_remaining))
-            
-            if coverage > best_subset_coverage:
-                best_subset_coverage = coverage
-                best_subset_index = i
-        
-        # If we found a subset that covers some remaining elements
-        if best_subset_coverage > 0:
+
             # Add the best subset to our solution
             solution.append(best_subset_index)
-            # Remove the covered elements from our remaining set
-            elements_remaining -= subsets[best_subset_index]
-        else:
-            # This should not happen if the problem instance is valid
-            # (i.e., if all elements can be covered by the given subsets)
-            break
-    
+
+            # Only subsets touching newly covered elements lose gain
+            if timed:
+                t0 = time.perf_counter()
+            elems = instance.elements(best_subset_index)
+            newly_covered = elems[~covered[elems]]
+            covered[newly_covered] = True
+            elements_remaining -= len(newly_covered)
+            np.subtract.at(gain, instance.subsets_of_elements(newly_covered), 1)
+            if timed:
+                update_time += time.perf_counter() - t0
+            if not elements_remaining:
+                break
+        level -= 1
+
     timeSpent = round(time.time() - start_time,2)
+    if stats is not None:
+        stats.update(iterations=len(solution), stale=stale, update_time=update_time)
     
     return solution, timeSpent
 
-def write_solution(filename, algorithm, cutoff_time, seed, solution_indices, subsets):
+def write_solution(filename, algorithm, cutoff_time, seed, solution_indices, instance):
     """
     Write the solution to the output file.
     
@@ -134,7 +136,7 @@ def write_solution(filename, algorithm, cutoff_time, seed, solution_indices, sub
         cutoff_time (int): Cutoff time in seconds
         seed (int): Random seed used
         solution_indices (list): List of indices of the chosen subsets (0-indexed)
-        subsets (list): List of sets, where each set is a subset of the universe
+        instance (Instance): The set cover instance
     """
     # Convert to 1-indexed for output
     one_indexed_solution = [i + 1 for i in solution_indices]
@@ -172,17 +174,17 @@ def main():
         filename = filename.split('.')[0]
     
     # Read the instance
-    universe, subsets = read_instance(args.inst)
+    instance = read_instance(args.inst)
     
     start_time = time.time()
     
     
     if args.alg == 'Approx':
         # Run the approximation algorithm
-        solution_indices = greedy_set_cover(universe, subsets)
+        solution_indices, _ = greedy_set_cover(instance)
         
         # Write the solution
-        write_solution(filename, args.alg, args.time, args.seed, solution_indices, subsets)
+        write_solution(filename, args.alg, args.time, args.seed, solution_indices, instance)
         
         print(filename)
     else:
@@ -4,28 +4,258 @@ BnB.py
 Branch & Bound for Minimum Set Cover, seeded with an O(log n)-approximation
 and pruned by the LP-relaxation lower bound at each node.
 
+The search is iterative (explicit stack or priority queue) and all of its state
+lives in a BranchAndBound object, so several searches can run in one process.
+
+ParallelBranchAndBound splits the tree at its first levels and searches the
+subtrees on a pool of worker processes that share the incumbent size.
+
 Exports:
-    branch_and_bound_min_set_cover(universe, subsets, cutoff)
+    BranchAndBound(instance, cutoff, bound, strategy, max_nodes)
+    ParallelBranchAndBound(instance, cutoff, bound, workers)
+    branch_and_bound_min_set_cover(instance, cutoff, bound, strategy, max_nodes, workers)
 
 Requires:
-    scipy.optimize.linprog
+    scipy.optimize.linprog, scipy.sparse
 """
 
 import time
 import math
+import heapq
+import multiprocessing as mp
+import os
+import queue
+from collections import deque
+
 import numpy as np
 from scipy.optimize import linprog
-from Approx import greedy_set_cover
+from scipy.sparse import csr_matrix
+from LS1 import start_cover
+from termination import Termination, SharedIncumbent
+
+# Numerical slack when comparing bounds derived from LP duals
+LP_TOL = 1e-7
+
+# Nodes a parallel worker expands between checks for idle workers
+DONATE_EVERY = 32
+
+# Seconds a parallel worker gets to exit once the search has ended
+WORKER_EXIT_TIMEOUT = 5
+
+
+class LPBound:
+    """
+    LP-relaxation bounding for one instance.
+
+    The sparse constraint matrix (rows = elements, columns = subsets) is built
+    once; the LP of a node is obtained by deleting the rows of covered elements
+    and the columns that no longer cover anything, and is handed to HiGHS as a
+    sparse matrix.
+
+    A child only loses rows, so the parent's LP solution carries over:
+    its dual (y restricted to the remaining rows, same upper-bound duals z) stays
+    dual feasible and gives a lower bound sum(y) - sum(z), and its primal x stays
+    feasible and gives an upper bound. When the dual bound already prunes the
+    child, or both bounds meet, the child's LP is not solved at all.
+    """
+
+    def __init__(self, instance):
+        self.instance = instance
+        self.A = csr_matrix(
+            (-np.ones(len(instance.elem_subsets)), instance.elem_subsets, instance.elem_ptr),
+            shape=(instance.n, instance.m)
+        )
+        self.max_cover = int(instance.subset_sizes.max()) if instance.m else 1
+
+        # statistics
+        self.nodes = 0       # bound requests
+        self.lp_calls = 0    # LPs actually solved
+        self.lp_time = 0.0   # seconds spent in HiGHS (including matrix slicing)
+        self.reused = 0      # nodes bounded from the parent's solution alone
+
+    def lower_bound(self, uncovered, parent=None, prune_at=float('inf'), time_limit=None):
+        """
+        LP lower bound on the number of subsets still needed to cover `uncovered`
+        (an array of element ids).
+
+        parent:   the LP solution returned for the parent node, or None
+        prune_at: bound value at which the caller prunes; used to decide whether
+                  the parent's dual bound is already good enough
+
+        Returns (bound, solution) where solution is passed to the children.
+        """
+        self.nodes += 1
+        if len(uncovered) == 0:
+            return 0, None
+
+        if parent is not None:
+            y, z_sum, x = parent
+            lb = y[uncovered].sum() - z_sum - LP_TOL
+            # columns that still cover an uncovered element keep their x value
+            cols = np.unique(self.instance.subsets_of_elements(uncovered))
+            ub = x[cols].sum()
+            if lb >= prune_at or ub - lb <= 2 * LP_TOL:
+                self.reused += 1
+                return max(lb, 0), parent
+
+        t = time.time()
+        value, solution = self._solve(uncovered, time_limit)
+        self.lp_calls += 1
+        self.lp_time += time.time() - t
+        if value is None:
+            # fallback: trivial bound
+            return math.ceil(len(uncovered) / self.max_cover), None
+        return value, solution
+
+    def _solve(self, uncovered, time_limit):
+        # Row deletion: keep the uncovered elements, then drop empty columns
+        rows = self.A[uncovered]
+        cols = np.flatnonzero(np.diff(rows.tocsc().indptr))
+        A_ub = rows[:, cols]
+
+        options = {'presolve': True}
+        if time_limit is not None:
+            options['time_limit'] = max(time_limit, 0.0)
+        try:
+            res = linprog(
+                np.ones(len(cols)),
+                A_ub=A_ub, b_ub=-np.ones(len(uncovered)),
+                bounds=(0, 1),
+                method='highs',
+                options=options
+            )
+        except Exception:
+            return None, None
+        if not res.success:
+            return None, None
+
+        # Duals as full-length vectors so children can index them directly
+        y = np.zeros(self.instance.n)
+        y[uncovered] = -res.ineqlin.marginals
+        x = np.zeros(self.instance.m)
+        x[cols] = res.x
+        z_sum = -res.upper.marginals.sum()
+        return res.fun, (y, z_sum, x)
+
+    def report(self):
+        """One-line summary of the bounding work and the time saved by reuse."""
+        avg = self.lp_time / self.lp_calls if self.lp_calls else 0.0
+        saved = self.reused * avg
+        per_node = saved / self.nodes if self.nodes else 0.0
+        return (f"LP bound: {self.nodes} nodes, {self.lp_calls} LPs in {self.lp_time:.2f}s "
+                f"({avg * 1000:.1f} ms/LP), {self.reused} bounded from parent solution, "
+                f"~{saved:.2f}s saved ({per_node * 1000:.1f} ms/node)")
+
+    def statistics(self):
+        """Counters and timers as a dict (see exec.py -profile)."""
+        return {'bound_nodes': self.nodes, 'lp_calls': self.lp_calls,
+                'lp_time': self.lp_time, 'lp_reused': self.reused}
+
+
+class TieredBound:
+    """
+    Tiered bounding: cheap combinatorial bounds are tried first and the LP
+    relaxation is only solved when none of them prunes the node.
+
+    Tiers, in order:
+        degree:  sum over uncovered e of 1 / max_{S ∋ e} |S ∩ U|. Charging every
+                 element to the subset that covers it, a subset is charged at
+                 most 1, so any cover of U has at least this many subsets.
+        packing: greedily pick uncovered elements no two of which share a subset;
+                 each of them needs its own subset.
+        lp:      LPBound (with reuse of the parent's LP solution)
+
+    Per tier, `calls` counts evaluations and `prunes` the nodes it pruned;
+    with timed=True, `time` accumulates the time spent in it.
+    """
+
+    tiers = ('degree', 'packing', 'lp')
+
+    def __init__(self, instance, lp=None, timed=False):
+        self.instance = instance
+        self.lp = lp if lp is not None else LPBound(instance)
+        self.timed = timed
+        self.calls = dict.fromkeys(self.tiers, 0)
+        self.prunes = dict.fromkeys(self.tiers, 0)
+        self.time = dict.fromkeys(self.tiers, 0.0)
+        self.nodes = 0
+
+    def lower_bound(self, uncovered, parent=None, prune_at=float('inf'), time_limit=None):
+        """Same contract as LPBound.lower_bound."""
+        self.nodes += 1
+        if len(uncovered) == 0:
+            return 0, parent
+
+        lb = 0
+        for tier, bound in (('degree', self.degree_bound), ('packing', self.packing_bound)):
+            if self.timed:
+                t = time.perf_counter()
+            lb = max(lb, bound(uncovered, prune_at))
+            self.calls[tier] += 1
+            if self.timed:
+                self.time[tier] += time.perf_counter() - t
+            if lb >= prune_at:
+                self.prunes[tier] += 1
+                # the parent's LP solution stays valid for the descendants
+                return lb, parent
+
+        if self.timed:
+            t = time.perf_counter()
+        lp_lb, solution = self.lp.lower_bound(uncovered, parent, prune_at, time_limit)
+        self.calls['lp'] += 1
+        if self.timed:
+            self.time['lp'] += time.perf_counter() - t
+        lb = max(lb, lp_lb)
+        if lb >= prune_at:
+            self.prunes['lp'] += 1
+        return lb, solution
+
+    def degree_bound(self, uncovered, prune_at):
+        instance = self.instance
+        # Residual size |S ∩ U| of every subset touching U
+        touching = instance.subsets_of_elements(uncovered)
+        residual = np.bincount(touching, minlength=instance.m)
+        # Best residual size among the subsets of each uncovered element
+        starts = np.zeros(len(uncovered), dtype=np.intp)
+        np.cumsum(instance.degree[uncovered][:-1], out=starts[1:])
+        best = np.maximum.reduceat(residual[touching], starts)
+        return math.ceil((1.0 / best).sum() - LP_TOL)
+
+    def packing_bound(self, uncovered, prune_at):
+        instance = self.instance
+        used = np.zeros(instance.m, dtype=bool)
+        packed = 0
+        # Rare elements first: they block the fewest other elements
+        for e in uncovered[np.argsort(instance.degree[uncovered], kind='stable')]:
+            owners = instance.subsets_of(e)
+            if not used[owners].any():
+                used[owners] = True
+                packed += 1
+                if packed >= prune_at:
+                    break
+        return packed
+
+    def report(self):
+        """Per-tier evaluations, prunes and time, followed by the LP report."""
+        tiers = ", ".join(
+            f"{tier} {self.prunes[tier]}/{self.calls[tier]} pruned" +
+            (f" in {self.time[tier]:.2f}s" if self.timed else "")
+            for tier in self.tiers
+        )
+        return f"Tiered bound: {self.nodes} nodes, {tiers}\n{self.lp.report()}"
+
+    def statistics(self):
+        """Per-tier counters and timers as a dict, LP statistics included."""
+        stats = {}
+        for tier in self.tiers:
+            stats.update({f"{tier}_calls": self.calls[tier], f"{tier}_prunes": self.prunes[tier],
+                          f"{tier}_time": self.time[tier]})
+        stats.update(self.lp.statistics())
+        return stats
 
-# Globals for incumbent & tracing
-best_solution = None  # list of 0-based subset indices
-best_solution_size = float('inf')
-trace_data = []  # (elapsed_sec, cover_size)
-start_time = 0.0
-cutoff_time = 0.0
 
 # Lower bound: LP-relaxation
-def fractional_lower_bound(uncovered, subsets):
+def fractional_lower_bound(uncovered, lp, parent=None, prune_at=float('inf'), time_limit=None):
     """
     Solve the LP-relaxation of set-cover on the uncovered elements.
 
@@ -33,116 +263,525 @@ def fractional_lower_bound(uncovered, subsets):
       s.t.     for each e in uncovered: sum_{j:e in S_j} x_j >= 1
                0 <= x_j <= 1
 
-    Returns the LP optimal value (a fractional lower bound).
-    Falls back to the trivial bound if LP fails.
-    """
-    m = len(subsets)
-    # Map each uncovered element to a row index
-    elems = list(uncovered)
-    elem_index = {e: i for i, e in enumerate(elems)}
-    num_rows = len(elems)
-
-    # Build constraint matrix A_ub * x <= b_ub for Ax >= 1 → -A x <= -1
-    A_ub = np.zeros((num_rows, m))
-    for j, S in enumerate(subsets):
-        for e in S:
-            if e in elem_index:
-                A_ub[elem_index[e], j] = -1.0
-
-    b_ub = -np.ones(num_rows)
-    c = np.ones(m)
-    bounds = [(0, 1) for _ in range(m)]
-
-    try:
-        res = linprog(
-            c,
-            A_ub=A_ub, b_ub=b_ub,
-            bounds=bounds,
-            method='highs',
-            options={'presolve': True}
-        )
-        if res.success:
-            # res.fun is the fractional optimum
-            return res.fun
-    except Exception:
-        pass
-
-    # fallback: trivial bound
-    if not uncovered:
-        return 0
-    max_cover = max(len(s) for s in subsets)
-    return math.ceil(len(uncovered) / max_cover)
-
-
-# Recursive Branch & Bound
-def branch_and_bound(universe, subsets, current_cover, current_solution):
-    global best_solution, best_solution_size, trace_data, start_time, cutoff_time
-
-    # 1) Time cutoff
-    if time.time() - start_time > cutoff_time:
-        return
-
-    # 2) Feasible check
-    if current_cover == universe:
-        if len(current_solution) < best_solution_size:
-            best_solution_size = len(current_solution)
-            best_solution = current_solution.copy()
-            elapsed = round(time.time() - start_time, 2)
-            trace_data.append((elapsed, best_solution_size))
-        return
-
-    # 3) LP-based pruning
-    uncovered = universe - current_cover
-    lb = fractional_lower_bound(uncovered, subsets)
-    if len(current_solution) + lb >= best_solution_size:
-        return
-
-    # 4) Choose branching element: fewest covering subsets
-    freq = {e: 0 for e in uncovered}
-    for s in subsets:
-        for e in s:
-            if e in freq:
-                freq[e] += 1
-    e_min = min(uncovered, key=lambda e: freq[e])
-
-    # 5) Branch on subsets covering e_min
-    candidates = [j for j, s in enumerate(subsets) if e_min in s]
-    # try those covering more of uncovered first
-    candidates.sort(key=lambda j: len(subsets[j] & uncovered), reverse=True)
-
-    for j in candidates:
-        current_solution.append(j)
-        branch_and_bound(
-            universe, subsets,
-            current_cover.union(subsets[j]),
-            current_solution
+    Returns (bound, solution): the LP optimal value (a fractional lower bound)
+    and the LP solution to hand to the children (see LPBound).
+    Falls back to the trivial bound if LP fails or runs out of time.
+
+    `lp` may also be a TieredBound, in which case the LP is only solved when the
+    combinatorial bounds fail to prune.
+    """
+    elems = np.asarray(uncovered, dtype=np.intp)
+    return lp.lower_bound(elems, parent, prune_at, time_limit)
+
+
+class CoverState:
+    """
+    Coverage counts of the subsets on the current search path. Moving between
+    nodes undoes back to the common prefix of the two paths and applies the rest,
+    so sibling and child moves only touch the subsets involved.
+
+    With branching=True the branching state is maintained along the path too:
+        residual[j]  |S_j ∩ U|, the uncovered elements of every subset; only
+                     the subsets containing newly (un)covered elements change
+        e_min        the uncovered element of smallest degree (ties: smallest
+                     index), at a position in the elements sorted by degree.
+                     U only shrinks down the path, so a child starts looking
+                     where its parent found e_min; positions are kept per
+                     depth and dropped on undo.
+    """
+
+    def __init__(self, instance, branching=False):
+        self.instance = instance
+        self.count = np.zeros(instance.n, dtype=np.intp)
+        self.path = []
+        self.residual = None
+        if branching:
+            self.residual = instance.subset_sizes.copy()
+            self.by_degree = np.argsort(instance.degree, kind='stable')
+            self.first = [0]  # per depth: no uncovered element before this position of by_degree
+            self._neighbours = {}
+
+    def neighbours(self, j):
+        """
+        Subsets containing each element of subset j (with repetitions) and, per
+        entry, the position of its element in S_j. Gathered once per subset.
+        """
+        entry = self._neighbours.get(j)
+        if entry is None:
+            elems = self.instance.elements(j)
+            entry = (self.instance.subsets_of_elements(elems),
+                     np.repeat(np.arange(len(elems)), self.instance.degree[elems]))
+            self._neighbours[j] = entry
+        return entry
+
+    def apply(self, j):
+        elems = self.instance.elements(j)
+        if self.residual is not None:
+            # Newly covered elements leave the residual of every subset containing them
+            subsets, owner = self.neighbours(j)
+            newly = self.count[elems] == 0
+            np.subtract.at(self.residual, subsets[newly[owner]], 1)
+            self.first.append(self.first[-1])
+        self.count[elems] += 1
+        self.path.append(j)
+
+    def undo(self):
+        j = self.path.pop()
+        elems = self.instance.elements(j)
+        self.count[elems] -= 1
+        if self.residual is not None:
+            subsets, owner = self.neighbours(j)
+            uncovered = self.count[elems] == 0
+            np.add.at(self.residual, subsets[uncovered[owner]], 1)
+            self.first.pop()
+
+    def e_min(self):
+        """Uncovered element of smallest degree (the branching element)."""
+        pos, count, by_degree = self.first[-1], self.count, self.by_degree
+        # Skip the elements covered since the parent's e_min
+        while count[by_degree[pos]]:
+            pos += 1
+        self.first[-1] = pos
+        return int(by_degree[pos])
+
+    def goto(self, path):
+        common = 0
+        for a, b in zip(self.path, path):
+            if a != b:
+                break
+            common += 1
+        while len(self.path) > common:
+            self.undo()
+        for j in path[common:]:
+            self.apply(j)
+
+    def uncovered(self):
+        return np.flatnonzero(self.count == 0)
+
+
+class BranchAndBound:
+    """
+    Iterative Branch & Bound search.
+
+    strategy:
+        'dfs'        depth-first with an explicit stack (the original search order)
+        'best-first' always expand the open node with the smallest bound
+        'best-dive'  take the best open node, then dive depth-first below it,
+                     leaving the siblings on the way in the priority queue
+    max_nodes: memory budget for the priority queue. Once it is full, the node
+               being expanded is finished depth-first instead of queueing children.
+    incumbent: optional shared incumbent (see portfolio.py); nodes are pruned
+               against the best cover size found by any solver sharing it.
+    termination: when to stop and whom to tell about new best covers (see
+               termination.py); by default the search stops at the cutoff. A
+               search that runs out of nodes ends as 'complete' (optimal).
+    initial:   optional cover to start from instead of the greedy one; its size
+               is the initial upper bound (see LS1.start_cover).
+    timed:     accumulate the time spent per phase (see statistics()); off
+               unless the run is profiled.
+
+    A node is (path, bound, lp_solution): the chosen subsets, the bound of the
+    parent (its priority until its own bound is computed), and the parent's LP
+    solution for bound reuse. The priority queue of the best-first strategies
+    only keeps the bound and the branching decision of a node, linked to the
+    entry of its parent: the path is rebuilt when the node is popped, and the
+    node is bounded without the parent's LP solution. A queued node thus takes
+    O(1) memory instead of O(n + m), and max_nodes bounds the queue's memory.
+    """
+
+    strategies = ('dfs', 'best-first', 'best-dive')
+
+    def __init__(self, instance, cutoff, bound='tiered', strategy='dfs', max_nodes=100000, incumbent=None,
+                 termination=None, initial=None, timed=False):
+        if strategy not in self.strategies:
+            raise ValueError(f"Unknown BnB strategy '{strategy}'")
+        self.instance = instance
+        self.cutoff = cutoff
+        self.strategy = strategy
+        self.max_nodes = max_nodes
+        self.incumbent = incumbent
+        self.termination = termination
+        self.initial = initial
+        self.timed = timed
+        self.node_bound = TieredBound(instance, timed=timed) if bound == 'tiered' else LPBound(instance)
+        self.state = CoverState(instance)
+        # Branching state, only moved to the nodes that are branched on (most are pruned)
+        self.branching = CoverState(instance, branching=True)
+
+        self.best_solution = None  # list of 0-based subset indices
+        self.best_solution_size = float('inf')
+
+        # statistics
+        self.expanded = 0
+        self.pruned = 0
+        self.max_open = 0
+        self.goto_time = 0.0    # moving the coverage counts between nodes
+        self.bound_time = 0.0   # lower bounds
+        self.branch_time = 0.0  # branching element and candidate ordering
+
+        # Work sharing of a parallel search (see ParallelBranchAndBound): called
+        # with the depth-first stack, may take open nodes off its bottom
+        self.donate = None
+
+    def upper_bound(self):
+        """Size a cover must beat: our incumbent or the shared one, whichever is smaller."""
+        if self.incumbent is None:
+            return self.best_solution_size
+        return min(self.best_solution_size, self.incumbent.value)
+
+    def _improve(self, solution):
+        self.best_solution_size = len(solution)
+        self.best_solution = list(solution)
+        self.termination.improve(self.best_solution_size, self.best_solution)
+
+    def run(self):
+        """
+        1) Run the greedy cover to get an initial upper bound (or take the initial cover).
+        2) Log that incumbent.
+        3) Branch & bound with the selected strategy.
+        Returns (best_solution, trace).
+        """
+        if self.termination is None:
+            callbacks = []
+            if self.incumbent is not None:
+                callbacks.append(lambda elapsed, size, solution: self.incumbent.offer(size))
+            self.termination = Termination(self.cutoff, callbacks=callbacks)
+
+        # --- INITIAL UPPER BOUND via the greedy cover (or the given cover) ---
+        self._improve(start_cover(self.instance, self.initial))
+
+        # --- BRANCH & BOUND SEARCH ---
+        root = ((), 0, None)
+        if self.strategy == 'dfs':
+            self._dfs(root)
+        else:
+            self._best_first(root)
+        # Every node was expanded or pruned: the incumbent is optimal
+        self.termination.complete()
+
+        return self.best_solution, self.termination.trace
+
+    def _expand(self, node):
+        """
+        Evaluate a node and return its children (empty if it is a leaf or pruned),
+        in the order they should be explored.
+        """
+        path, _, parent_lp = node
+        timed = self.timed
+        if timed:
+            t0 = time.perf_counter()
+        self.state.goto(path)
+        self.expanded += 1
+        uncovered = self.state.uncovered()
+        if timed:
+            t1 = time.perf_counter()
+            self.goto_time += t1 - t0
+
+        # 1) Feasible check
+        if len(uncovered) == 0:
+            if len(path) < self.best_solution_size:
+                self._improve(path)
+            return []
+
+        # 2) Bound-based pruning
+        upper = self.upper_bound()
+        prune_at = upper - len(path)
+        lb, node_lp = fractional_lower_bound(
+            uncovered, self.node_bound, parent_lp, prune_at,
+            self.termination.remaining()
         )
-        current_solution.pop()
+        if timed:
+            t2 = time.perf_counter()
+            self.bound_time += t2 - t1
+        if len(path) + lb >= upper:
+            self.pruned += 1
+            return []
 
+        # 3) Choose branching element: fewest covering subsets
+        self.branching.goto(path)
+        e_min = self.branching.e_min()
 
-# Minimum Set Cover for BnB
-def branch_and_bound_min_set_cover(universe, subsets, cutoff):
+        # 4) Branch on subsets covering e_min,
+        # trying those covering more of uncovered first
+        candidates = self.instance.subsets_of(e_min)
+        order = np.argsort(-self.branching.residual[candidates], kind='stable')
+        if timed:
+            self.branch_time += time.perf_counter() - t2
+
+        bound = len(path) + lb
+        return [(path + (int(candidates[i]),), bound, node_lp) for i in order]
+
+    def _dfs(self, root):
+        stack = [root]
+        while stack:
+            # Time cutoff, target or cancel
+            if self.termination.stop():
+                return
+            children = self._expand(stack.pop())
+            stack.extend(reversed(children))
+            self.max_open = max(self.max_open, len(stack))
+            if self.donate is not None and len(stack) > 1 and self.expanded % DONATE_EVERY == 0:
+                self.donate(stack)
+
+    def _best_first(self, root):
+        # Priority: bound, then deeper nodes first, then insertion order. An
+        # entry holds a link (parent link, subset) instead of the node
+        counter = 0
+        heap = [(root[1], 0, counter, None)]
+        while heap:
+            if self.termination.stop():
+                return
+            bound, _, _, link = heapq.heappop(heap)
+            if bound >= self.upper_bound():
+                self.pruned += 1
+                continue
+
+            children = self._expand((_unlink(link), bound, None))
+            while children:
+                # best-dive keeps following the first child and only queues its siblings
+                queued = children[1:] if self.strategy == 'best-dive' else children
+                room = max(self.max_nodes - len(heap), 0)
+                for path, child_bound, _ in queued[:room]:
+                    counter += 1
+                    heapq.heappush(heap, (child_bound, -len(path), counter, (link, path[-1])))
+                # Out of queue memory: finish the remaining subtrees depth-first
+                for child in queued[room:]:
+                    self._dfs(child)
+                if self.strategy != 'best-dive' or self.termination.stop():
+                    break
+                link = (link, children[0][0][-1])
+                children = self._expand(children[0])
+            self.max_open = max(self.max_open, len(heap))
+
+    def report(self):
+        """Search statistics followed by the bounding report."""
+        return (f"BnB ({self.strategy}): {self.expanded} nodes expanded, {self.pruned} pruned, "
+                f"max {self.max_open} open\n{self.node_bound.report()}")
+
+    def statistics(self):
+        """Search and bounding counters and timers as a dict (see exec.py -profile)."""
+        stats = {'iterations': self.expanded, 'pruned': self.pruned, 'max_open': self.max_open,
+                 'goto_time': self.goto_time, 'bound_time': self.bound_time,
+                 'branch_time': self.branch_time}
+        stats.update(self.node_bound.statistics())
+        return stats
+
+
+def _unlink(link):
+    """Path of a queued best-first node from its (parent link, subset) chain."""
+    path = []
+    while link is not None:
+        link, j = link
+        path.append(j)
+    return tuple(reversed(path))
+
+
+def _subtree_worker(instance, bound, deadline, incumbent, tasks, results, pending, idle, workers, stop, timed):
     """
-    1) Run greedy_set_cover to get an initial upper bound.
-    2) Log that incumbent.
-    3) Recursively branch & bound using LP-relaxation pruning.
+    Worker process of ParallelBranchAndBound. Takes subtree roots from `tasks`
+    and searches them depth-first, pruning with the shared incumbent size. New
+    best covers go to `results`; when other workers are idle and nothing is
+    queued, the shallowest open nodes of the stack are put back on `tasks`.
+    A None task ends the worker, which then sends its statistics.
+    """
+    donated = 0
+
+    def report(elapsed, size, solution):
+        incumbent.offer(size)
+        results.put(('improve', size, list(solution)))
+
+    def donate(stack):
+        nonlocal donated
+        # Open tasks beyond those being searched are already waiting for the idle workers
+        waiting = idle.value
+        queued = pending.value - (workers - waiting)
+        wanted = min(waiting - max(queued, 0), len(stack) - 1)
+        if wanted <= 0:
+            return
+        # The bottom of the stack holds the shallowest nodes, i.e. the largest subtrees
+        given = stack[:wanted]
+        del stack[:wanted]
+        with pending.get_lock():
+            pending.value += wanted
+        for node in given:
+            tasks.put(node)
+        donated += wanted
+
+    termination = Termination(deadline - time.time(), cancel=stop, callbacks=[report])
+    solver = BranchAndBound(instance, termination.cutoff, bound, 'dfs', incumbent=incumbent, termination=termination,
+                            timed=timed)
+    solver.donate = donate
+    while True:
+        with idle.get_lock():
+            idle.value += 1
+        node = tasks.get()
+        with idle.get_lock():
+            idle.value -= 1
+        if node is None:
+            break
+        if not termination.stop():
+            solver._dfs(node)
+        with pending.get_lock():
+            pending.value -= 1
+    results.put(('done', solver.statistics(), donated))
+
+
+class ParallelBranchAndBound:
+    """
+    Branch & Bound with the subtrees searched on `workers` processes.
+
+    The tree is expanded breadth-first (with the usual e_min branching) until
+    there are `split` open nodes per worker; these subtrees are then searched
+    depth-first by the workers. All of them prune with the best cover size
+    found by any worker (shared memory), and a worker that sees idle workers
+    and an empty queue hands over the shallowest nodes of its stack, so
+    unbalanced trees keep every worker busy.
+
+    The cutoff, trace and termination semantics are those of BranchAndBound:
+    new best covers of the workers are recorded by this process as they
+    arrive, and a search that runs out of nodes ends as 'complete'. If a
+    worker dies (an exception, the OOM killer), the search ends as 'failed'
+    with the best cover found so far.
     """
-    global best_solution, best_solution_size, trace_data, start_time, cutoff_time
 
-    # reset
-    best_solution = None
-    best_solution_size = float('inf')
-    trace_data = []
-    start_time = time.time()
-    cutoff_time = cutoff
+    def __init__(self, instance, cutoff, bound='tiered', workers=None, incumbent=None, termination=None, split=4,
+                 initial=None, timed=False):
+        self.instance = instance
+        self.cutoff = cutoff
+        self.bound = bound
+        self.workers = workers or os.cpu_count() or 1
+        self.incumbent = incumbent
+        self.termination = termination
+        self.split = split
+        self.initial = initial
+        self.timed = timed
 
-    # --- INITIAL UPPER BOUND via Approximation ---
-    approx_sol, approx_time = greedy_set_cover(universe, subsets)
-    best_solution = approx_sol.copy()
-    best_solution_size = len(approx_sol)
-    trace_data.append((round(time.time() - start_time, 2), best_solution_size))
+        self.best_solution = None
+        self.split_nodes = 0
+        self.donated = 0
+        self.worker_stats = []
+        self.failed = 0  # workers that died
+        self.master = None
 
-    # --- BRANCH & BOUND SEARCH ---
-    branch_and_bound(universe, subsets, set(), [])
+    def run(self):
+        """Returns (best_solution, trace), like BranchAndBound.run."""
+        termination = self.termination
+        if termination is None:
+            termination = self.termination = Termination(self.cutoff)
+            if self.incumbent is not None:
+                termination.callbacks.append(lambda elapsed, size, solution: self.incumbent.offer(size))
+        shared = SharedIncumbent()
+        termination.callbacks.append(lambda elapsed, size, solution: shared.offer(size))
 
-    return best_solution, trace_data
+        # --- INITIAL UPPER BOUND via the greedy cover (or the given cover) ---
+        master = self.master = BranchAndBound(self.instance, self.cutoff, self.bound, 'dfs',
+                                              incumbent=shared, termination=termination, timed=self.timed)
+        master._improve(start_cover(self.instance, self.initial))
+
+        # --- SPLIT: breadth-first down to `split` open nodes per worker ---
+        frontier = deque([((), 0, None)])
+        while frontier and len(frontier) < self.split * self.workers and not termination.stop():
+            frontier.extend(master._expand(frontier.popleft()))
+        self.split_nodes = master.expanded
+        if not frontier:
+            termination.complete()
+        if termination.stop():
+            self.best_solution = master.best_solution
+            return self.best_solution, termination.trace
+
+        # --- SUBTREES on the worker processes ---
+        tasks, results = mp.Queue(), mp.Queue()
+        pending = mp.Value('i', len(frontier))  # subtrees queued or being searched
+        idle = mp.Value('i', 0)
+        stop = mp.Event()
+        for node in frontier:
+            tasks.put(node)
+        deadline = termination.start + termination.cutoff
+        procs = [mp.Process(target=_subtree_worker, daemon=True,
+                            args=(self.instance, self.bound, deadline, shared, tasks, results,
+                                  pending, idle, self.workers, stop, self.timed))
+                 for _ in range(self.workers)]
+        for p in procs:
+            p.start()
+
+        best_solution = master.best_solution
+        finished = 0
+        failed = set()
+        while finished + len(failed) < self.workers:
+            try:
+                message = results.get(timeout=0.05)
+            except queue.Empty:
+                message = None
+            if message is not None:
+                kind, first, second = message
+                if kind == 'improve':
+                    if termination.improve(first, second):
+                        best_solution = second
+                else:
+                    finished += 1
+                    self.worker_stats.append(first)
+                    self.donated += second
+            # A worker that exits without its 'done' message died; its subtrees are lost
+            dead = {i for i, p in enumerate(procs) if p.exitcode not in (None, 0)} - failed
+            if dead:
+                failed |= dead
+                termination.fail()
+            if not stop.is_set():
+                if termination.stop():
+                    stop.set()
+                elif pending.value == 0:
+                    # Every subtree was searched: the incumbent is optimal
+                    termination.complete()
+                    stop.set()
+                if stop.is_set():
+                    for _ in procs:
+                        tasks.put(None)
+        for p in procs:
+            p.join(timeout=WORKER_EXIT_TIMEOUT)
+            if p.is_alive():
+                p.terminate()  # e.g. blocked on a lock the dead worker held
+        # Subtrees left on the queue are dropped instead of being flushed at exit
+        tasks.cancel_join_thread()
+        self.failed = len(failed)
+
+        self.best_solution = best_solution
+        return best_solution, termination.trace
+
+    def report(self):
+        stats = self.statistics()
+        return (f"Parallel BnB ({self.workers} workers): {stats['iterations']} nodes expanded "
+                f"({self.split_nodes} in the split), {stats['pruned']} pruned, "
+                f"{self.donated} subtrees handed to idle workers" +
+                (f", {self.failed} workers died" if self.failed else ""))
+
+    def statistics(self):
+        """Counters and timers summed over the split and the workers (see exec.py -profile)."""
+        stats = self.master.statistics() if self.master is not None else {}
+        for worker in self.worker_stats:
+            for key, value in worker.items():
+                if key == 'max_open':
+                    stats[key] = max(stats.get(key, 0), value)
+                elif isinstance(value, (int, float)):
+                    stats[key] = stats.get(key, 0) + value
+        stats.update(workers=self.workers, split_nodes=self.split_nodes, donated=self.donated, failed=self.failed)
+        return stats
+
+
+# Minimum Set Cover for BnB
+def branch_and_bound_min_set_cover(instance, cutoff, bound='tiered', strategy='dfs', max_nodes=100000, incumbent=None,
+                                   termination=None, workers=1, initial=None):
+    """
+    1) Run the greedy cover to get an initial upper bound.
+    2) Log that incumbent.
+    3) Branch & bound using LP-relaxation pruning.
+
+    bound: 'lp' solves the LP relaxation at every node, 'tiered' tries the
+    combinatorial bounds first (see TieredBound).
+    strategy, max_nodes, incumbent, termination, initial: see BranchAndBound.
+    workers: with more than one, the subtrees are searched in parallel
+    (see ParallelBranchAndBound; depth-first, strategy and max_nodes unused).
+    """
+    if workers > 1:
+        return ParallelBranchAndBound(instance, cutoff, bound, workers, incumbent, termination,
+                                      initial=initial).run()
+    return BranchAndBound(instance, cutoff, bound, strategy, max_nodes, incumbent, termination, initial).run()
@@ -2,71 +2,308 @@ import random
 import math
 import time
 
+import numpy as np
+
+from Approx import greedy_set_cover
+from schedule import make_schedule
+from termination import Termination
+
 # Simulated Annealing for Set Cover
-def simulated_annealing(universe, subsets, cutoff_time=10, start_temp=100.0, cooling_rate=0.99, seed=0):
+def simulated_annealing(instance, cutoff_time=10, start_temp=100.0, cooling_rate=0.99, seed=0, incremental=True, termination=None, stats=None, schedule='geometric', initial=None):
+    """
+    schedule: 'geometric' (start_temp, multiplied by cooling_rate after every
+    move), 'adaptive', or a schedule object (see schedule.py).
+    termination: when to stop and whom to tell about new best covers (see
+    termination.py); by default the run stops at cutoff_time.
+    initial: a cover to start from instead of the greedy one (see start_cover).
+    """
     random.seed(seed)
-    start = time.time()
+    if termination is None:
+        termination = Termination(cutoff_time)
+    if isinstance(schedule, str):
+        schedule = make_schedule(schedule, cutoff_time, start_temp, cooling_rate)
 
-	# Initialize with greedy set cover
-    current_solution = greedy_cover(universe, subsets)
+	# Initialize with greedy set cover (or the given cover)
+    current_solution = start_cover(instance, initial)
     best_solution = current_solution[:]
-    current_temp = start_temp
+    termination.improve(len(best_solution), best_solution)
 
-    trace = [(0.0, len(best_solution))]
+    if incremental:
+        return incremental_annealing(instance, current_solution, schedule, termination, stats)
+
+    # Trial moves from the initial cover, for schedules that calibrate
+    size = schedule.move_size
+    schedule.calibrate(lambda: len(perturb_solution_idx(current_solution, instance, size)) - len(current_solution))
 
     # Run until time limit
-    while time.time() - start < cutoff_time:
+    moves = accepted = 0
+    timed = stats is not None
+    perturb_time = 0.0
+    while not termination.stop():
+        elapsed = termination.elapsed()
+        current_temp = schedule.temperature(elapsed)
 
 		# Perturb solution and calculate cost of current and perturbed solutions
-        neighbor = perturb_solution_idx(current_solution, subsets, universe)
+        if timed:
+            t0 = time.perf_counter()
+        neighbor = perturb_solution_idx(current_solution, instance, size)
+        if timed:
+            perturb_time += time.perf_counter() - t0
+        moves += 1
         curr_cost = len(current_solution)
         neighbor_cost = len(neighbor)
+        improved = False
 
         # Accept better solution or worse with probability based on temperature
         if neighbor_cost < curr_cost:
             current_solution = neighbor
-            if neighbor_cost < len(best_solution):
+            accepted += 1
+            if termination.improve(neighbor_cost, neighbor):
                 best_solution = neighbor
-                trace.append((round(time.time() - start, 2), neighbor_cost))
+                improved = True
         else:
-            prob = math.exp(-(neighbor_cost - curr_cost) / current_temp)
+            delta = neighbor_cost - curr_cost
+            prob = math.exp(-delta / current_temp) if current_temp > 0 else float(delta == 0)
             if random.random() < prob:
                 current_solution = neighbor
+                accepted += 1
+
+        if schedule.step(improved, elapsed) == 'restart':
+            current_solution = best_solution[:]
+
+    # Counters and timers for benchmarking and profiling (see bench.py, exec.py -profile)
+    if stats is not None:
+        stats.update(iterations=moves, accepted=accepted, rejected=moves - accepted,
+                     improvements=len(termination.trace) - 1, perturb_time=perturb_time, **schedule.stats())
+    return best_solution, termination.trace
+
+# Simulated Annealing on an incrementally maintained cover (the same move as
+# perturb_solution_idx)
+def incremental_annealing(instance, solution, schedule, termination, stats=None):
+    state = CoverState(instance, solution, timed=stats is not None)
+    best_solution = state.solution[:]
+    size = schedule.move_size
+
+    schedule.calibrate(lambda: state.trial(size))
+
+    moves = rejected = 0
+    while not termination.stop():
+        elapsed = termination.elapsed()
+        current_temp = schedule.temperature(elapsed)
+        move = state.perturb(size)
+        removed, added, dropped = move
+        moves += 1
+        delta = len(added) - len(removed) - len(dropped)
+        improved = False
+
+        # Accept better solution or worse with probability based on temperature
+        if delta < 0:
+            if termination.improve(len(state.solution), state.solution):
+                best_solution = state.solution[:]
+                improved = True
+        else:
+            prob = math.exp(-delta / current_temp) if current_temp > 0 else float(delta == 0)
+            if random.random() >= prob:
+                state.undo(move)
+                rejected += 1
+
+        # Stagnation: the schedule may reheat or restart from the best cover
+        if schedule.step(improved, elapsed) == 'restart':
+            state.reset(best_solution)
+
+    if stats is not None:
+        stats.update(iterations=moves, accepted=moves - rejected, rejected=rejected,
+                     improvements=len(termination.trace) - 1, **schedule.stats(), **state.stats())
+    return best_solution, termination.trace
+
+class CoverState:
+    """
+    Cover kept with per-element coverage counts. Removing a subset, greedily
+    repairing the cover and undoing a move only touch the subsets and elements
+    involved, so a move no longer costs a full re-cover of the universe.
+
+    With timed=True the time spent in repair and undo is accumulated.
+    """
+
+    def __init__(self, instance, solution, timed=False):
+        self.instance = instance
+        self.reset(solution)
 
-        current_temp *= cooling_rate
-
-    return best_solution, trace
-
-# Greedy Set Cover heuristic
-def greedy_cover(universe, subsets):
-    uncovered = set(universe)
-    cover_indices = []
-    subset_indices = list(range(len(subsets)))
-    
-    while uncovered:
-        # Select the subset index that covers the most uncovered elements.
-        best_idx = max(subset_indices, key=lambda i: len(uncovered & subsets[i]))
-        cover_indices.append(best_idx)
-        uncovered -= subsets[best_idx]
-    return cover_indices
-
-# Modify solution by removing one subset and repairing
-def perturb_solution_idx(solution, subsets, universe):
-	# Remove a random subset
+        # statistics
+        self.timed = timed
+        self.repaired = 0       # subsets added by repairs
+        self.repair_time = 0.0
+        self.undo_time = 0.0
+
+    def reset(self, solution):
+        """Start over from another cover (statistics are kept)."""
+        self.solution = list(solution)
+        self.position = {idx: i for i, idx in enumerate(self.solution)}
+        self.count = np.bincount(self.instance.elements_of(self.solution), minlength=self.instance.n)
+        self.in_cover = np.zeros(self.instance.m, dtype=bool)
+        self.in_cover[self.solution] = True
+
+    def add(self, idx):
+        self.position[idx] = len(self.solution)
+        self.solution.append(idx)
+        self.in_cover[idx] = True
+        self.count[self.instance.elements(idx)] += 1
+
+    def remove(self, idx):
+        # Swap with the last entry so removal is O(1)
+        i = self.position.pop(idx)
+        last = self.solution.pop()
+        if last != idx:
+            self.solution[i] = last
+            self.position[last] = i
+        self.in_cover[idx] = False
+        elems = self.instance.elements(idx)
+        self.count[elems] -= 1
+        # Elements left uncovered by the removal
+        return elems[self.count[elems] == 0]
+
+    def repair(self, missing):
+        if self.timed:
+            t0 = time.perf_counter()
+        added = []
+        while len(missing):
+            # Gains of the subsets touching missing elements; ties go to the smallest index
+            candidates, gains = np.unique(self.instance.subsets_of_elements(missing), return_counts=True)
+            best_idx = int(candidates[np.argmax(gains)])
+            self.add(best_idx)
+            added.append(best_idx)
+            missing = missing[self.count[missing] == 0]
+        self.repaired += len(added)
+        if self.timed:
+            self.repair_time += time.perf_counter() - t0
+        return added
+
+    def drop_redundant(self, added):
+        """Remove the cover subsets made redundant by the added ones."""
+        instance = self.instance
+        # Cover subsets sharing an element with the added ones (filtered before
+        # the unique: the cover is a small part of the neighbourhood)
+        touched = instance.subsets_of_elements(instance.elements_of(added))
+        dropped = []
+        for idx in np.unique(touched[self.in_cover[touched]]).tolist():
+            if (self.count[instance.elements(idx)] > 1).all():
+                self.remove(idx)
+                dropped.append(idx)
+        return dropped
+
+    def perturb(self, size=1):
+        """
+        Remove `size` random subsets and greedily repair. Returns the move as
+        (removed, added, dropped); its cover size change is
+        len(added) - len(removed) - len(dropped).
+
+        With size=1 this is the original move. The removed subset alone covers
+        what its removal uncovers, so that move never makes the cover larger.
+        With size > 1 the repair can be worse than the removed subsets (which
+        gives the temperature something to act on) or better, and subsets made
+        redundant by the repair are dropped.
+        """
+        removed = []
+        missing = np.zeros(0, dtype=np.intp)
+        if len(self.solution) > size:
+            if size == 1:
+                removed = [random.choice(self.solution)]
+                missing = self.remove(removed[0])
+            else:
+                removed = random.sample(self.solution, size)
+                for idx in removed:
+                    self.remove(idx)
+                missing = np.unique(self.instance.elements_of(removed))
+                missing = missing[self.count[missing] == 0]
+        added = self.repair(missing)
+        dropped = self.drop_redundant(added) if size > 1 and added else []
+        return removed, added, dropped
+
+    def undo(self, move):
+        if self.timed:
+            t0 = time.perf_counter()
+        removed, added, dropped = move
+        for idx in reversed(dropped):
+            self.add(idx)
+        for idx in reversed(added):
+            self.remove(idx)
+        for idx in reversed(removed):
+            self.add(idx)
+        if self.timed:
+            self.undo_time += time.perf_counter() - t0
+
+    def trial(self, size=1):
+        """Cover size change of a random move, which is undone."""
+        move = self.perturb(size)
+        self.undo(move)
+        removed, added, dropped = move
+        return len(added) - len(removed) - len(dropped)
+
+    def stats(self):
+        return {'repaired': self.repaired, 'repair_time': self.repair_time, 'undo_time': self.undo_time}
+
+def start_cover(instance, initial=None, construct=None):
+    """
+    Start cover of LS1, LS2, LS3 and BnB: `initial` if given, otherwise
+    construct(instance), by default the greedy cover (Approx.greedy_set_cover).
+    initial is a warm start (a repaired earlier cover, see
+    delta.py, or the best known cover, see incumbents.py) and is used as it is:
+    the callers check that it covers the instance, and exec.py -warm compares a
+    best known cover with the greedy one before handing it over.
+    """
+    if initial is not None:
+        return list(initial)
+    if construct is None:
+        return greedy_set_cover(instance)[0]
+    return construct(instance)
+
+# Modify solution by removing `size` subsets and repairing (the move of
+# CoverState.perturb, recomputed from scratch)
+def perturb_solution_idx(solution, instance, size=1):
+	# Remove random subsets
     new_solution = solution[:]
-    if len(new_solution) > 1:
-        new_solution.remove(random.choice(new_solution))
-    
+    if len(new_solution) > size:
+        if size == 1:
+            new_solution.remove(random.choice(new_solution))
+        else:
+            removed = set(random.sample(new_solution, size))
+            new_solution = [idx for idx in new_solution if idx not in removed]
+
 	# Calculate what's missing
-    covered = set()
-    for idx in new_solution:
-        covered |= subsets[idx]
-    missing = set(universe) - covered
-
-    all_indices = list(range(len(subsets)))
-    while missing:
-        # Greedily add subset to cover missing
-        best_idx = max(all_indices, key=lambda i: len(missing & subsets[i]))
-        new_solution.append(best_idx)
-        missing -= subsets[best_idx]
-    return new_solution
\ No newline at end of file
+    missing = np.ones(instance.n, dtype=bool)
+    missing[instance.elements_of(new_solution)] = False
+    kept = len(new_solution)
+    new_solution = cover_greedily(instance, new_solution, missing)
+    if size == 1 or len(new_solution) == kept:
+        return new_solution
+
+    # Drop the cover subsets made redundant by the repair
+    count = np.bincount(instance.elements_of(new_solution), minlength=instance.n)
+    touched = np.zeros(instance.m, dtype=bool)
+    touched[instance.subsets_of_elements(instance.elements_of(new_solution[kept:]))] = True
+    dropped = set()
+    for idx in new_solution[:kept]:
+        if touched[idx]:
+            elems = instance.elements(idx)
+            if (count[elems] > 1).all():
+                count[elems] -= 1
+                dropped.add(idx)
+    return [idx for idx in new_solution if idx not in dropped]
+
+# Greedily add subsets to `solution` until no element of the `uncovered` mask is left
+def cover_greedily(instance, solution, uncovered):
+    # Gains of all subsets at once; afterwards only the subsets touching newly
+    # covered elements lose gain. argmax breaks ties towards the smallest index.
+    gain = instance.gains(uncovered)
+    remaining = int(np.count_nonzero(uncovered))
+    while remaining:
+        best_idx = int(np.argmax(gain))
+        if gain[best_idx] == 0:
+            break  # the rest cannot be covered
+        solution.append(best_idx)
+        elems = instance.elements(best_idx)
+        newly_covered = elems[uncovered[elems]]
+        uncovered[newly_covered] = False
+        remaining -= len(newly_covered)
+        gain -= instance.gains(newly_covered)
+    return solution
@@ -2,124 +2,199 @@ import time
 import numpy as np
 import random
 
-def greedy_cover(universe, subsets):
-    uncovered = set(universe)
+from LS1 import start_cover
+from termination import Termination
+
+def random_cover(instance, block=1024):
+    """
+    Pick uniformly random subsets that still cover something until everything
+    is covered. The uncovered counts of all subsets are kept in one array and
+    the number of useful subsets per block of `block` indices is maintained, so
+    the k-th useful subset is found without a pass over all m subsets. The
+    draws are the same as random.choice over the list of useful subsets.
+    """
+    gain = instance.subset_sizes.copy()
+    useful = np.bincount(np.flatnonzero(gain > 0) // block, minlength=-(-instance.m // block))
+    covered = np.zeros(instance.n, dtype=bool)
+    remaining = instance.n
     cover_indices = []
-    subset_indices = list(range(len(subsets)))
 
-    while uncovered:
-        best_idx = max(subset_indices, key=lambda i: len(uncovered & subsets[i]))
-        cover_indices.append(best_idx)
-        uncovered -= subsets[best_idx]
-
-    return cover_indices
-
-def random_cover(universe, subsets):
-    uncovered = set(universe)
-    cover_indices = []
-    subset_indices = list(range(len(subsets)))
-
-    while uncovered:
-        valid_indices = [i for i in subset_indices if subsets[i] & uncovered]
-        if not valid_indices:
-            break 
+    while remaining:
+        total = int(useful.sum())
+        if not total:
+            break
 
-        chosen_idx = random.choice(valid_indices)
+        # k-th useful subset in index order: find its block, then its offset
+        k = random.randrange(total)
+        counts = np.cumsum(useful)
+        b = int(np.searchsorted(counts, k, side='right'))
+        k -= int(counts[b - 1]) if b else 0
+        lo = b * block
+        chosen_idx = lo + int(np.flatnonzero(gain[lo:lo + block] > 0)[k])
         cover_indices.append(chosen_idx)
-        uncovered -= subsets[chosen_idx]
+
+        elems = instance.elements(chosen_idx)
+        newly_covered = elems[~covered[elems]]
+        covered[newly_covered] = True
+        remaining -= len(newly_covered)
+        touched, drop = np.unique(instance.subsets_of_elements(newly_covered), return_counts=True)
+        gain[touched] -= drop
+        np.subtract.at(useful, touched[gain[touched] == 0] // block, 1)
 
     return cover_indices
 
-def hill_climbing_min_set_cover(universe, subsets, cutoff_time):
+def redundant_candidates(instance, cover, count_table):
+    """Subsets of the cover (in cover order) whose elements are all covered at least twice."""
+    sizes = instance.subset_sizes[cover]
+    lowest = np.full(len(cover), 2, dtype=np.int64)
+    nonempty = sizes > 0
+    if nonempty.any():
+        offsets = np.cumsum(sizes) - sizes
+        counts = count_table[instance.elements_of(cover)]
+        lowest[nonempty] = np.minimum.reduceat(counts, offsets[nonempty])
+    return [idx for idx, low in zip(cover, lowest.tolist()) if low > 1]
+
+def drop_redundant(instance, candidates, count_table):
+    """
+    Remove from the cover the candidates whose elements are all covered twice,
+    one after the other (counts only drop during the pass, so the candidates
+    found in bulk beforehand are the only ones). Returns the removed subsets.
+    """
+    removed = []
+    for idx in redundant_candidates(instance, candidates, count_table):
+        elems = instance.elements(idx)
+        if (count_table[elems] > 1).all():
+            count_table[elems] -= 1
+            removed.append(idx)
+    return removed
+
+def hill_climbing_min_set_cover(instance, cutoff_time, termination=None, stats=None, initial=None):
+    # termination: when to stop and whom to tell about new best covers (see termination.py)
+    # initial: a cover to start from instead of the random one (see LS1.start_cover)
+    if termination is None:
+        termination = Termination(cutoff_time)
     start_time = time.time()
-    n = len(universe)
+    n = instance.n
 
-    element_to_subsets = {e: [] for e in universe}
-    for idx, s in enumerate(subsets):
-        for e in s:
-            element_to_subsets[e].append(idx)
+    timed = stats is not None
+    neighbor_time = redundancy_time = 0.0
 
     #cover initialization 
-    #current_cover = greedy_cover(universe, subsets)
-    current_cover = random_cover(universe, subsets)
+    current_cover = start_cover(instance, initial, random_cover)
+    init_time = time.time() - start_time
 
     # Build count table for checking coverage fast
-    count_table = np.zeros(n, dtype=int)
-    for idx in current_cover:
-        for e in subsets[idx]:
-            count_table[e-1] += 1
-
-    history = [(round(time.time() - start_time, 2), len(current_cover))]
-    cover_idx = random.choice(current_cover)
-    #cover_idx = min(current_cover, key=lambda idx: len(subsets[idx]))
+    count_table = np.bincount(instance.elements_of(current_cover), minlength=n)
+
+    # Membership structures: an insertion-ordered dict keeps the list semantics
+    # of the cover with O(1) removal, the mask filters neighbors in bulk
+    in_cover = np.zeros(instance.m, dtype=bool)
+    in_cover[current_cover] = True
+    # Insertion order of the cover subsets, for visiting them in cover order
+    order_of = np.zeros(instance.m, dtype=np.int64)
+    order_of[current_cover] = np.arange(len(current_cover))
+    inserted = len(current_cover)
+    current_cover = dict.fromkeys(current_cover)
+
+    termination.improve(len(current_cover), list(current_cover))
+    cover_idx = random.choice(list(current_cover))
    
     tabu_set = set()  
     check = 0
     length = len(current_cover)
+    swaps = accepted = removed = 0  # swaps evaluated, swaps made, redundant subsets dropped
+    pruned = False  # whether the whole cover was checked for redundant subsets
+    cover_nnz = int(instance.subset_sizes[list(current_cover)].sum())
 
     # time limit
-    while time.time() - start_time < cutoff_time:
-        cover_set = subsets[cover_idx]
-        neighbor_indices = set()
-        for e in cover_set:
-            neighbor_indices.update(element_to_subsets[e])
-        neighbor_indices -= set(current_cover)
-        neighbor_indices.discard(cover_idx)
+    while not termination.stop():
+        if timed:
+            t0 = time.perf_counter()
+        neighbor_indices = np.unique(instance.subsets_of_elements(instance.elements(cover_idx)))
+        neighbor_indices = neighbor_indices[~in_cover[neighbor_indices]]
 
         # search neighbor in increasing order of size
-        sorted_neighbors = sorted(neighbor_indices, key=lambda i: len(subsets[i]), reverse=True)
+        order = np.argsort(-instance.subset_sizes[neighbor_indices], kind='stable')
+        sorted_neighbors = neighbor_indices[order].tolist()
         improved = False
+        if timed:
+            neighbor_time += time.perf_counter() - t0
 
         for new_idx in sorted_neighbors:
             if cover_idx in tabu_set: # prevent backtracking
                 continue  
 
-            temp_count = count_table.copy()
-
-            for e in subsets[cover_idx]:
-                temp_count[e - 1] -= 1
-            for e in subsets[new_idx]:
-                temp_count[e - 1] += 1
+            # swap in place: only the elements of the removed subset can become uncovered
+            swaps += 1
+            out_elems = instance.elements(cover_idx)
+            in_elems = instance.elements(new_idx)
+            count_table[out_elems] -= 1
+            count_table[in_elems] += 1
 
             # check coverage
-            if np.all(temp_count > 0):
-                current_cover.remove(cover_idx)
-                current_cover.append(new_idx)
-                count_table = temp_count
-                improved = True
-
-                tabu_set.add(cover_idx)
-                tabu_set.add(new_idx)
-
-                cover_idx = new_idx
-
-                # remove unnecessary subsets from the cover
-                to_remove = []
-                reduced = False
-                for idx in current_cover:
-                    temp_count = count_table.copy()
-                    for e in subsets[idx]:
-                        temp_count[e - 1] -= 1
-                    if np.all(temp_count > 0):
-                        count_table = temp_count
-                        to_remove.append(idx)
-                        reduced = True
-
-                for idx in to_remove:
-                    current_cover.remove(idx)
-
-                # check if the new cover is better than the previous one
-                if reduced:
-                    elapsed = round(time.time() - start_time, 2)
-                    history.append((elapsed, len(current_cover)))
-                    break
+            if not (count_table[out_elems] > 0).all():
+                count_table[out_elems] += 1
+                count_table[in_elems] -= 1
+                continue
+
+            del current_cover[cover_idx]
+            current_cover[new_idx] = None
+            order_of[new_idx] = inserted
+            inserted += 1
+            in_cover[cover_idx] = False
+            in_cover[new_idx] = True
+            improved = True
+
+            tabu_set.add(cover_idx)
+            tabu_set.add(new_idx)
+
+            cover_idx = new_idx
+            accepted += 1
+
+            # remove unnecessary subsets from the cover (every element covered twice).
+            # The first pass checks the whole cover. After it, only the counts of
+            # the new subset's elements go up, so only the cover subsets sharing
+            # one of them can have become redundant: those are checked, in cover
+            # order, unless scanning the whole (small) cover is cheaper
+            if timed:
+                t0 = time.perf_counter()
+            cover_nnz += len(in_elems) - len(out_elems)
+            if pruned and int(instance.degree[in_elems].sum()) < cover_nnz:
+                touched = instance.subsets_of_elements(in_elems)
+                touched = np.unique(touched[in_cover[touched]])
+                candidates = touched[np.argsort(order_of[touched], kind='stable')].tolist()
+            else:
+                candidates = list(current_cover)
+                pruned = True
+            to_remove = drop_redundant(instance, candidates, count_table)
+            cover_nnz -= int(instance.subset_sizes[to_remove].sum())
+            reduced = bool(to_remove)
+
+            for idx in to_remove:
+                del current_cover[idx]
+                in_cover[idx] = False
+            removed += len(to_remove)
+            if timed:
+                redundancy_time += time.perf_counter() - t0
+
+            # check if the new cover is better than the previous one
+            if reduced:
+                termination.improve(len(current_cover), list(current_cover))
+                break
 
         if not improved:
             check += 1
             tabu_set = set()  
-            cover_idx = random.choice(current_cover)
+            cover_idx = random.choice(list(current_cover))
 
         # early stopping code
         if check == min(length, 100):
+            termination.complete()
             break
-    return sorted(current_cover), history
\ No newline at end of file
+
+    # Counters and timers for benchmarking and profiling (see bench.py, exec.py -profile)
+    if stats is not None:
+        stats.update(iterations=swaps, accepted=accepted, rejected=swaps - accepted,
+                     removed=removed, restarts=check, init_time=init_time,
+                     neighbor_time=neighbor_time, redundancy_time=redundancy_time)
+    return sorted(current_cover), termination.trace
\ No newline at end of file
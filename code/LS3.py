@@ -0,0 +1,214 @@
+"""
+LS3.py
+
+Weighted-element local search with configuration checking for set cover.
+
+Every element carries a weight that grows while the element stays uncovered.
+The score of a subset is the weight it would cover (outside the cover) or the
+weight only it covers (negative, inside the cover). The search keeps a cover
+one subset smaller than the best found and swaps subsets until it is complete
+again:
+
+    - while the cover is complete, record it and remove the subset of highest
+      score (ties: the oldest), so the search targets a smaller cover
+    - remove the highest scoring subset other than the one just added
+    - pick a random uncovered element and add the highest scoring subset
+      containing it whose configuration changed since it was last removed
+      (configuration checking: a subset can only come back after one of its
+      neighbours, a subset sharing an element, changed state)
+    - raise the weight of every uncovered element by one
+
+Weights, scores, timestamps and the coverage counts (the count table of LS2)
+are numpy arrays updated incrementally: a move only touches the elements of
+the moved subset and the subsets containing them. Unlike LS2 there is no early
+stopping; the search runs until the cutoff (or another termination criterion,
+see termination.py).
+"""
+
+import random
+import time
+
+import numpy as np
+
+from LS1 import start_cover
+from termination import Termination
+
+
+class WeightedCover:
+    """
+    Cover with element weights, subset scores, timestamps and configuration
+    flags. cover_sum[e] is the sum of the cover subsets containing element e,
+    so the only subset covering an element with count 1 is read off directly.
+    """
+
+    def __init__(self, instance, solution):
+        self.instance = instance
+        n, m = instance.n, instance.m
+        self.weight = np.ones(n, dtype=np.int64)
+        self.count = np.bincount(instance.elements_of(solution), minlength=n)
+        self.cover_sum = np.bincount(instance.elements_of(solution),
+                                     weights=np.repeat(solution, instance.subset_sizes[solution]),
+                                     minlength=n).astype(np.int64)
+        self.in_cover = np.zeros(m, dtype=bool)
+        self.in_cover[solution] = True
+        self.size = len(solution)
+        self.uncovered = int(np.count_nonzero(self.count == 0))
+
+        # With unit weights the scores are plain counts
+        self.score = np.where(self.in_cover, -instance.gains(self.count == 1), instance.gains(self.count == 0))
+        self.stamp = np.zeros(m, dtype=np.int64)
+        self.conf = np.ones(m, dtype=bool)
+        self._neighbours = {}
+
+    def neighbours(self, idx):
+        """
+        Elements of subset idx, the subsets containing each of them (with
+        repetitions) and, per entry, the position of its element. Gathered once
+        per subset: every move of the subset touches the same entries.
+        """
+        entry = self._neighbours.get(idx)
+        if entry is None:
+            elems = self.instance.elements(idx)
+            degree = self.instance.degree[elems]
+            entry = (elems, self.instance.subsets_of_elements(elems), np.repeat(np.arange(len(elems)), degree))
+            self._neighbours[idx] = entry
+        return entry
+
+    def solution(self):
+        return np.flatnonzero(self.in_cover).tolist()
+
+    def add(self, idx):
+        elems, subsets, owner = self.neighbours(idx)
+        before = self.count[elems]
+        weight = self.weight[elems]
+        newly = before == 0
+        shared = before == 1
+        # Newly covered elements no longer count for the other subsets containing
+        # them; elements now covered twice are no longer critical to their subset
+        hit = newly[owner]
+        np.subtract.at(self.score, subsets[hit], weight[owner[hit]])
+        np.add.at(self.score, self.cover_sum[elems[shared]], weight[shared])
+        self.count[elems] += 1
+        self.cover_sum[elems] += idx
+        self.score[idx] = -weight[newly].sum()
+        self.in_cover[idx] = True
+        self.size += 1
+        self.uncovered -= int(np.count_nonzero(newly))
+        self.conf[subsets] = True
+
+    def remove(self, idx):
+        elems, subsets, owner = self.neighbours(idx)
+        self.count[elems] -= 1
+        self.cover_sum[elems] -= idx
+        after = self.count[elems]
+        weight = self.weight[elems]
+        lost = after == 0
+        single = after == 1
+        # Uncovered elements count for every subset containing them again; the
+        # last subset covering an element becomes critical for it
+        hit = lost[owner]
+        np.add.at(self.score, subsets[hit], weight[owner[hit]])
+        np.subtract.at(self.score, self.cover_sum[elems[single]], weight[single])
+        self.score[idx] = weight[lost].sum()
+        self.in_cover[idx] = False
+        self.size -= 1
+        self.uncovered += int(np.count_nonzero(lost))
+        self.conf[subsets] = True
+        self.conf[idx] = False
+
+    def best_in(self, candidates):
+        """Highest scoring candidate; ties go to the one that changed state longest ago."""
+        scores = self.score[candidates]
+        ties = candidates[scores == scores.max()]
+        return int(ties[np.argmin(self.stamp[ties])])
+
+    def removal_candidate(self, tabu=-1):
+        candidates = np.flatnonzero(self.in_cover)
+        if tabu >= 0 and len(candidates) > 1:
+            candidates = candidates[candidates != tabu]
+        return self.best_in(candidates)
+
+    def addition_candidate(self):
+        """Best subset covering a random uncovered element, among those allowed by configuration checking."""
+        uncovered = np.flatnonzero(self.count == 0)
+        elem = uncovered[random.randrange(len(uncovered))]
+        candidates = self.instance.subsets_of(elem)
+        allowed = candidates[self.conf[candidates]]
+        return self.best_in(allowed if len(allowed) else candidates)
+
+    def bump_weights(self):
+        """Raise the weight of every uncovered element (and so the score of the subsets containing it)."""
+        uncovered = np.flatnonzero(self.count == 0)
+        self.weight[uncovered] += 1
+        np.add.at(self.score, self.instance.subsets_of_elements(uncovered), 1)
+
+
+def weighted_local_search(instance, cutoff_time, termination=None, stats=None, initial=None):
+    # termination: when to stop and whom to tell about new best covers (see termination.py)
+    # initial: a cover to start from instead of the greedy one (see LS1.start_cover)
+    if termination is None:
+        termination = Termination(cutoff_time)
+
+    # Greedy (or given) start without redundant subsets (cover subsets of score 0)
+    state = WeightedCover(instance, start_cover(instance, initial))
+    if state.uncovered:
+        termination.improve(state.size, state.solution())
+        return state.solution(), termination.trace
+    while True:
+        cover = np.flatnonzero(state.in_cover)
+        redundant = cover[state.score[cover] == 0]
+        if not len(redundant):
+            break
+        state.remove(int(redundant[0]))
+
+    best_solution = state.solution()
+    termination.improve(len(best_solution), best_solution)
+
+    step = 0
+    tabu = -1
+    timed = stats is not None
+    swap_time = weight_time = 0.0
+
+    while not termination.stop() and state.size > 1:
+        # Complete cover: keep it if it is the best, then aim one subset lower
+        while not state.uncovered and state.size > 1:
+            if state.size < len(best_solution):
+                best_solution = state.solution()
+                termination.improve(len(best_solution), best_solution)
+                if termination.stop():
+                    break
+            idx = state.removal_candidate()
+            state.remove(idx)
+            state.stamp[idx] = step
+        if termination.stop():
+            break
+
+        if timed:
+            t0 = time.perf_counter()
+        idx = state.removal_candidate(tabu)
+        state.remove(idx)
+        state.stamp[idx] = step
+
+        idx = state.addition_candidate()
+        state.add(idx)
+        state.stamp[idx] = step
+        tabu = idx
+        if timed:
+            t1 = time.perf_counter()
+            swap_time += t1 - t0
+
+        state.bump_weights()
+        if timed:
+            weight_time += time.perf_counter() - t1
+        step += 1
+
+    # The last swap may have completed a better cover
+    if not state.uncovered and state.size < len(best_solution):
+        best_solution = state.solution()
+        termination.improve(len(best_solution), best_solution)
+
+    # Counters and timers for benchmarking and profiling (see bench.py, exec.py -profile)
+    if stats is not None:
+        stats.update(iterations=step, improvements=len(termination.trace) - 1, max_weight=int(state.weight.max()),
+                     swap_time=swap_time, weight_time=weight_time)
+    return sorted(best_solution), termination.trace
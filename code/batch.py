@@ -0,0 +1,132 @@
+"""
+batch.py
+
+Batch experiment scheduler: runs a grid of instances x algorithms x seeds x
+cutoffs in one interpreter. Each instance is parsed once and shipped to the
+workers of a process pool, so runs no longer pay for interpreter start-up,
+the NumPy/SciPy imports and instance parsing.
+
+Runs whose .sol and .trace files already exist are skipped, so an interrupted
+batch resumes where it stopped. Throughput (runs/minute) is reported at the end.
+With -target opt, a run ends as soon as it reaches the .out optimum; with
+-stall, after that many seconds without improvement.
+
+Usage:
+    python batch.py -insts small1 small2 -algs LS1 LS2 -seeds 1-20 -times 5 30 [-workers N]
+    python batch.py -grid grid.json
+
+A grid file holds the same keys, e.g.
+    {"insts": ["large1", "large2"], "algs": ["LS1"], "seeds": "1-20", "times": [30]}
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+
+from exec import load_dataset, load_optimum, solution_name, OUTPUT_DIR
+from portfolio import parse_seeds
+from presolve import presolve
+import solvers
+from solvers import worker
+
+
+def _run(task):
+    inst, alg, cutoff, seed = task
+    instance, presolved, target = worker['instances'][inst]
+    result = solvers.run_and_save(inst, alg, cutoff, seed, instance, presolved, worker['store'],
+                                  target=target, stall=worker['stall'])
+    return task, len(result)
+
+
+def expand_grid(insts, algs, seeds, times):
+    """All runs of the grid; seeds only matter for the seeded algorithms (LS1/LS2/LS3)."""
+    tasks = []
+    for inst in insts:
+        for alg in algs:
+            for cutoff in times:
+                for seed in (seeds if solvers.seeded(alg) else seeds[:1]):
+                    tasks.append((inst, alg, float(cutoff), seed))
+    return tasks
+
+
+def is_done(task):
+    """
+    Whether the run has finished: both of its output files exist. save_dataset
+    moves complete files into place, .trace last, so a run killed while
+    writing them is run again.
+    """
+    base = os.path.join(OUTPUT_DIR, solution_name(*task))
+    return os.path.exists(base + ".sol") and os.path.exists(base + ".trace")
+
+
+def run_batch(tasks, workers=None, use_presolve=False, target=None, stall=None, store=False):
+    """
+    Run the tasks that have no output files yet. Returns (runs completed, seconds).
+    target: None, a cover size, or 'opt' for the .out optimum of each instance.
+    stall: end a run after this many seconds without a better cover.
+    store: also add every run to the results store of its instance (results.py).
+    """
+    pending = [t for t in tasks if not is_done(t)]
+    skipped = len(tasks) - len(pending)
+    if skipped:
+        print(f"Skipping {skipped} completed runs")
+    if not pending:
+        return 0, 0.0
+
+    start = time.time()
+    # Parse every instance once
+    instances = {}
+    for inst in sorted({t[0] for t in pending}):
+        instance = load_dataset(inst)
+        presolved = presolve(instance) if use_presolve else None
+        goal = load_optimum(inst) if target == 'opt' else target
+        if goal is not None and presolved is not None:
+            goal -= len(presolved.fixed)  # added back to every cover
+        instances[inst] = (presolved.instance if presolved else instance, presolved, goal)
+
+    done = 0
+    workers = workers or os.cpu_count() or 1
+    state = {'instances': instances, 'stall': stall, 'store': store}
+    with mp.Pool(workers, initializer=solvers.init_worker, initargs=(state,)) as pool:
+        for (inst, alg, cutoff, seed), size in pool.imap_unordered(_run, pending):
+            done += 1
+            print(f"[{done}/{len(pending)}] {solution_name(inst, alg, cutoff, seed)}: {size}", flush=True)
+    return done, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-grid', help='JSON file with insts, algs, seeds and times')
+    parser.add_argument('-insts', nargs='+', help='Instance names')
+    parser.add_argument('-algs', nargs='+', default=['LS1', 'LS2'], choices=solvers.names())
+    parser.add_argument('-seeds', default='1', help="Seeds, e.g. '1-20' or '1,3,5'")
+    parser.add_argument('-times', nargs='+', type=float, help='Cutoff times in seconds')
+    parser.add_argument('-workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('-presolve', action='store_true', help='Reduce the instances before solving')
+    parser.add_argument('-target', help="End a run once it reaches this cover size ('opt': the .out optimum)")
+    parser.add_argument('-stall', type=float, help='End a run after this many seconds without a better cover')
+    parser.add_argument('-store', action='store_true', help='Also add the runs to the results stores output/<inst>.sqlite')
+    args = parser.parse_args()
+
+    grid = {'insts': args.insts, 'algs': args.algs, 'seeds': args.seeds, 'times': args.times}
+    if args.grid:
+        with open(args.grid, 'r') as f:
+            grid.update(json.load(f))
+    if not grid['insts'] or not grid['times']:
+        parser.error("the grid needs instances (-insts) and cutoff times (-times)")
+
+    seeds = grid['seeds']
+    if isinstance(seeds, str):
+        seeds = parse_seeds(seeds)
+    tasks = expand_grid(grid['insts'], grid['algs'], seeds, grid['times'])
+
+    target = args.target if args.target in (None, 'opt') else int(args.target)
+    done, elapsed = run_batch(tasks, args.workers, args.presolve, target, args.stall, args.store)
+    if done:
+        print(f"{done} runs in {elapsed:.1f}s ({done / elapsed * 60:.1f} runs/minute)")
+
+
+if __name__ == "__main__":
+    main()
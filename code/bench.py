@@ -0,0 +1,392 @@
+"""
+bench.py
+
+Benchmarks for the set cover code.
+
+Modes:
+    load     instance load time: line-by-line text parsing (the former
+             exec.load_dataset), the streaming parser, and the binary cache
+    solvers  Approx, LS1, LS2 and BnB over the data/ instances with fixed seeds
+             and cutoffs: wall time, iterations per second (greedy steps, SA
+             moves, LS2 swaps evaluated, BnB nodes expanded), peak memory and
+             relative error against the .out optimum. Every run gets a fresh
+             process so its peak RSS is its own. The per-phase counters and
+             timers of the run (as written by exec.py -profile) are stored too.
+    micro    time per call of the solver hot paths (the Instance.gains kernel,
+             Approx.greedy_set_cover, LS1.perturb_solution_idx and the incremental
+             move, LS2 cover construction and redundancy scan,
+             BnB.fractional_lower_bound with both bounding modes)
+    startup  cold-start latency of a run per algorithm, in a fresh
+             interpreter: interpreter start, importing exec.py, loading the
+             instance (with NumPy), importing the solver module (see
+             solvers.py) and the run itself with a tiny cutoff
+
+solvers, micro and startup can save their results as JSON (-save) and compare them
+with a stored baseline (-baseline). The exit status is 1 when a throughput
+drops by more than -tolerance, or a solver returns a larger cover than in
+the baseline.
+
+Usage:
+    python bench.py load [-insts large1 large10 ...] [-repeat 5]
+    python bench.py solvers [-insts ...] [-algs ...] [-seeds 1] [-time 5] [-save new.json] [-baseline base.json]
+    python bench.py micro [-insts ...] [-budget 1] [-save new.json] [-baseline base.json]
+    python bench.py startup [-insts small1] [-algs ...] [-repeat 5] [-save new.json] [-baseline base.json]
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from exec import DATA_DIR, load_dataset, run_algorithm
+from instance import Instance, parse_instance, load_cache, save_cache
+from portfolio import parse_seeds
+import solvers as registry  # the algorithm registry (main() has a "solvers" subparser)
+
+# What an iteration is for every solver
+ITERATIONS = {'Approx': 'greedy steps', 'LS1': 'moves', 'LS2': 'swaps evaluated', 'LS3': 'swaps', 'BnB': 'nodes expanded'}
+# Throughput metric compared against the baseline, per mode
+METRIC = {'solvers': 'iterations_per_sec', 'micro': 'calls_per_sec', 'startup': 'starts_per_sec'}
+
+
+def all_instances(prefixes=('small', 'large')):
+    """Names of the data/ instances starting with one of the prefixes."""
+    names = [os.path.basename(p)[:-3] for p in glob.glob(os.path.join(DATA_DIR, '*.in'))]
+    return sorted((n for n in names if n.startswith(prefixes)), key=lambda n: (n.rstrip('0123456789'), int(n.lstrip('abcdefghijklmnopqrstuvwxyz'))))
+
+
+def parse_lines(path):
+    """Reference text parser: readlines + one Python list per subset."""
+    with open(path, 'r') as f:
+        lines = f.readlines()
+    n, _ = list(map(int, lines[0].strip().split(" ")))
+    rows = [list(map(int, line.strip().split(" ")[1:])) for line in lines[1:]]
+    subset_ptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(r) for r in rows], out=subset_ptr[1:])
+    return Instance(n, subset_ptr, np.array([e for r in rows for e in r], dtype=np.intp) - 1)
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return min(times)
+
+
+def bench_load(insts, repeat):
+    print(f"{'instance':<10} {'n':>7} {'m':>7} {'nnz':>9} {'lines (ms)':>11} {'stream (ms)':>12} {'cache (ms)':>11} {'speedup':>8}")
+    for inst in insts:
+        path = os.path.join(DATA_DIR, inst + '.in')
+        instance = parse_instance(path)
+        save_cache(path, instance)
+        t_lines = best_of(lambda: parse_lines(path), repeat)
+        t_stream = best_of(lambda: parse_instance(path), repeat)
+        t_cache = best_of(lambda: load_cache(path), repeat)
+        print(f"{inst:<10} {instance.n:>7} {instance.m:>7} {len(instance.subset_elems):>9} "
+              f"{t_lines * 1000:>11.2f} {t_stream * 1000:>12.2f} {t_cache * 1000:>11.2f} "
+              f"{t_lines / t_cache:>7.1f}x")
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def optimum(inst):
+    """Optimal (or best known) cover size from data/<inst>.out, None if there is none."""
+    try:
+        with open(os.path.join(DATA_DIR, inst + '.out'), 'r') as f:
+            return int(f.readline())
+    except (OSError, ValueError):
+        return None
+
+
+def is_cover(instance, solution):
+    return bool(np.bincount(instance.elements_of(solution), minlength=instance.n).all())
+
+
+def _solver_run(task):
+    """One benchmark run, in a fresh worker process."""
+    inst, alg, cutoff, seed = task
+    instance = load_dataset(inst)
+    base_rss = peak_rss_mb()
+    stats = {}
+    start = time.perf_counter()
+    result, trace = run_algorithm(instance, alg, cutoff, seed, stats=stats)
+    wall = time.perf_counter() - start
+
+    best = optimum(inst)
+    iterations = stats.get('iterations', 0)
+    return {
+        'key': f"{inst}/{alg}/{seed}/{cutoff}",
+        'inst': inst, 'alg': alg, 'seed': seed, 'cutoff': cutoff,
+        'wall': round(wall, 4),
+        'iterations': iterations,
+        'iterations_per_sec': round(iterations / wall, 2) if wall > 0 else 0.0,
+        'size': len(result),
+        'valid': is_cover(instance, result),
+        'optimum': best,
+        'rel_error': round((len(result) - best) / best, 4) if best else None,
+        'time_to_best': trace[-1][0],
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'base_rss_mb': round(base_rss, 1),
+        'profile': stats,
+    }
+
+
+def bench_solvers(insts, algs, seeds, cutoff, workers=1):
+    """Run every (instance, algorithm, seed); seeds only matter for the seeded algorithms."""
+    tasks = [(inst, alg, cutoff, seed)
+             for inst in insts for alg in algs
+             for seed in (seeds if registry.seeded(alg) else seeds[:1])]
+    results = []
+    print(f"{'run':<28} {'wall (s)':>9} {'iter/s':>11} {'size':>6} {'opt':>5} {'rel err':>8} {'peak MB':>8}")
+    # spawn + one task per child: a clean process (and peak RSS) for every run
+    with mp.get_context('spawn').Pool(workers, maxtasksperchild=1) as pool:
+        for r in pool.imap(_solver_run, tasks):
+            results.append(r)
+            err = '-' if r['rel_error'] is None else f"{r['rel_error']:.4f}"
+            flag = '' if r['valid'] else '  INVALID COVER'
+            print(f"{r['key']:<28} {r['wall']:>9.3f} {r['iterations_per_sec']:>11.1f} {r['size']:>6} "
+                  f"{str(r['optimum'] or '-'):>5} {err:>8} {r['peak_rss_mb']:>8.1f}{flag}", flush=True)
+    return results
+
+
+def time_calls(fn, budget):
+    """Call fn repeatedly for about `budget` seconds (at least once). Returns (calls, seconds)."""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget:
+            return calls, elapsed
+
+
+def micro_cases(instance, budget):
+    """(name, fn) for every hot path, set up on one instance."""
+    from Approx import greedy_set_cover
+    import LS1
+    import LS2
+    from BnB import LPBound, TieredBound, fractional_lower_bound
+
+    greedy, _ = greedy_set_cover(instance)
+    state = LS1.CoverState(instance, greedy)
+
+    def incremental_move():
+        state.undo(state.perturb())
+
+    random.seed(0)
+    cover = LS2.random_cover(instance)
+    count_table = np.bincount(instance.elements_of(cover), minlength=instance.n)
+
+    # A BnB node halfway down the greedy path
+    depth = len(greedy) // 2
+    covered = np.bincount(instance.elements_of(greedy[:depth]), minlength=instance.n)
+    uncovered = np.flatnonzero(covered == 0)
+    prune_at = len(greedy) - depth
+    lp = LPBound(instance)
+    tiered = TieredBound(instance)
+
+    return [
+        ('Instance.gains[dense]', lambda: instance.gains(np.ones(instance.n, dtype=bool))),
+        ('Instance.gains[sparse]', lambda: instance.gains(uncovered[:max(len(uncovered) // 8, 1)])),
+        ('Approx.greedy_set_cover', lambda: greedy_set_cover(instance)),
+        ('LS1.perturb_solution_idx', lambda: LS1.perturb_solution_idx(greedy, instance)),
+        ('LS1.CoverState.perturb', incremental_move),
+        ('LS2.random_cover', lambda: LS2.random_cover(instance)),
+        ('LS2.redundant_candidates', lambda: LS2.redundant_candidates(instance, cover, count_table)),
+        ('BnB.fractional_lower_bound[lp]',
+         lambda: fractional_lower_bound(uncovered, lp, prune_at=prune_at, time_limit=budget)),
+        ('BnB.fractional_lower_bound[tiered]',
+         lambda: fractional_lower_bound(uncovered, tiered, prune_at=prune_at, time_limit=budget)),
+    ]
+
+
+def bench_micro(insts, budget):
+    results = []
+    print(f"{'case':<52} {'calls':>7} {'us/call':>12}")
+    for inst in insts:
+        instance = load_dataset(inst)
+        for name, fn in micro_cases(instance, budget):
+            random.seed(0)
+            calls, elapsed = time_calls(fn, budget)
+            r = {
+                'key': f"{inst}/{name}", 'inst': inst, 'case': name,
+                'calls': calls,
+                'us_per_call': round(elapsed / calls * 1e6, 2),
+                'calls_per_sec': round(calls / elapsed, 2),
+            }
+            results.append(r)
+            print(f"{r['key']:<52} {calls:>7} {r['us_per_call']:>12.1f}", flush=True)
+    return results
+
+
+# Phases of a cold start, timed inside the fresh interpreter
+STARTUP_PROBE = """
+import time
+t0 = time.perf_counter()
+from exec import load_dataset, run_algorithm
+import solvers
+t1 = time.perf_counter()
+instance = load_dataset({inst!r})
+t2 = time.perf_counter()
+solvers.get({alg!r}).load()
+t3 = time.perf_counter()
+run_algorithm(instance, {alg!r}, {cutoff!r}, 1)
+t4 = time.perf_counter()
+print(t1 - t0, t2 - t1, t3 - t2, t4 - t3)
+"""
+
+
+def bench_startup(insts, algs, repeat, cutoff=0.01):
+    """Best-of-repeat cold start per (instance, algorithm); the interpreter start is the wall time not seen by the probe."""
+    code_dir = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    print(f"{'run':<20} {'total (ms)':>11} {'python':>8} {'exec':>8} {'load':>8} {'solver':>8} {'run':>8}")
+    for inst in insts:
+        load_dataset(inst)  # build the binary cache outside the timings
+        for alg in algs:
+            probe = STARTUP_PROBE.format(inst=inst, alg=alg, cutoff=cutoff)
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                out = subprocess.run([sys.executable, '-c', probe], cwd=code_dir, check=True,
+                                     capture_output=True, text=True).stdout
+                wall = time.perf_counter() - start
+                if best is None or wall < best[0]:
+                    best = (wall, [float(x) for x in out.split()[-4:]])
+            wall, (t_exec, t_load, t_solver, t_run) = best
+            r = {
+                'key': f"{inst}/{alg}", 'inst': inst, 'alg': alg,
+                'total_ms': round(wall * 1000, 1),
+                'python_ms': round((wall - t_exec - t_load - t_solver - t_run) * 1000, 1),
+                'exec_import_ms': round(t_exec * 1000, 1),
+                'load_ms': round(t_load * 1000, 1),
+                'solver_import_ms': round(t_solver * 1000, 1),
+                'run_ms': round(t_run * 1000, 1),
+                'starts_per_sec': round(1 / wall, 2),
+            }
+            results.append(r)
+            print(f"{r['key']:<20} {r['total_ms']:>11.1f} {r['python_ms']:>8.1f} {r['exec_import_ms']:>8.1f} "
+                  f"{r['load_ms']:>8.1f} {r['solver_import_ms']:>8.1f} {r['run_ms']:>8.1f}", flush=True)
+    return results
+
+
+def compare(mode, results, baseline, tolerance):
+    """Print the changes against a baseline. Returns the number of regressions."""
+    metric = METRIC[mode]
+    base = {r['key']: r for r in baseline['results']}
+    regressions = 0
+    print(f"\n{'vs baseline':<52} {'speed':>8} {'size':>10}")
+    for r in results:
+        b = base.get(r['key'])
+        if b is None or not b[metric]:
+            continue
+        ratio = r[metric] / b[metric]
+        notes = []
+        if ratio < 1 - tolerance:
+            notes.append('SLOWER')
+        size = ''
+        if mode == 'solvers':
+            size = f"{b['size']}->{r['size']}"
+            if r['size'] > b['size'] or not r['valid']:
+                notes.append('WORSE')
+        regressions += bool(notes)
+        print(f"{r['key']:<52} {ratio:>7.2f}x {size:>10}  {' '.join(notes)}")
+    missing = len(set(base) - {r['key'] for r in results})
+    if missing:
+        print(f"{missing} baseline entries were not run")
+    print(f"{regressions} regressions (tolerance {tolerance:.0%})")
+    return regressions
+
+
+def save_results(path, mode, results, settings):
+    meta = {
+        'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+    with open(path, 'w') as f:
+        json.dump({'mode': mode, 'meta': meta, 'settings': settings, 'results': results}, f, indent=1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest='mode', required=True)
+
+    load = sub.add_parser('load', help='Instance load time: text parsing vs binary cache')
+    load.add_argument('-insts', nargs='+', default=None, help='Instances (default: all large*)')
+    load.add_argument('-repeat', type=int, default=5, help='Repetitions (best time is reported)')
+
+    solvers = sub.add_parser('solvers', help='Solver throughput and solution quality')
+    solvers.add_argument('-algs', nargs='+', default=['Approx', 'LS1', 'LS2', 'LS3', 'BnB'],
+                         choices=registry.names())
+    solvers.add_argument('-seeds', default='1', help="Seeds, e.g. '1-5' or '1,3'")
+    solvers.add_argument('-time', type=float, default=5, help='Cutoff time in seconds')
+    solvers.add_argument('-workers', type=int, default=1,
+                         help='Parallel runs (default 1; more runs in parallel add timing noise)')
+
+    micro = sub.add_parser('micro', help='Time per call of the solver hot paths')
+    micro.add_argument('-budget', type=float, default=1.0, help='Seconds per case (also the LP time limit)')
+
+    startup = sub.add_parser('startup', help='Cold-start latency per algorithm')
+    startup.add_argument('-algs', nargs='+', default=['Approx', 'LS1', 'LS2', 'LS3', 'BnB'],
+                         choices=registry.names())
+    startup.add_argument('-repeat', type=int, default=5, help='Fresh interpreters per algorithm (best time is reported)')
+
+    for p in (solvers, micro, startup):
+        p.add_argument('-insts', nargs='+', default=None,
+                       help='Instances (default: small1 for startup, otherwise all small* and large*)')
+        p.add_argument('-save', help='Write the results to this JSON file')
+        p.add_argument('-baseline', help='Compare with the results in this JSON file')
+        p.add_argument('-tolerance', type=float, default=0.25,
+                       help='Allowed relative throughput drop before a regression is reported')
+
+    args = parser.parse_args()
+    if args.mode == 'load':
+        bench_load(args.insts or all_instances(('large',)), args.repeat)
+        return
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        if baseline.get('mode') != args.mode:
+            parser.error(f"{args.baseline} holds '{baseline.get('mode')}' results")
+
+    if args.mode == 'startup':
+        insts = args.insts or ['small1']
+        settings = {'insts': insts, 'algs': args.algs, 'repeat': args.repeat}
+        results = bench_startup(insts, args.algs, args.repeat)
+    elif args.mode == 'solvers':
+        insts = args.insts or all_instances()
+        settings = {'insts': insts, 'algs': args.algs, 'seeds': args.seeds, 'time': args.time}
+        results = bench_solvers(insts, args.algs, parse_seeds(args.seeds), args.time, args.workers)
+    else:
+        insts = args.insts or all_instances()
+        settings = {'insts': insts, 'budget': args.budget}
+        results = bench_micro(insts, args.budget)
+
+    if args.save:
+        save_results(args.save, args.mode, results, settings)
+    if baseline is not None:
+        if compare(args.mode, results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
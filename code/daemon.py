@@ -0,0 +1,242 @@
+"""
+daemon.py
+
+Long-lived solver daemon for many short runs.
+
+A plain `python exec.py ...` run pays for the interpreter start, the
+NumPy/SciPy imports and loading the instance before it solves anything. The
+daemon pays for them once: it imports the solvers, loads the instances given
+with -insts and then forks a pool of worker processes that inherit both.
+Solve requests arrive on a Unix socket, are accepted by an asyncio server and
+run on the pool, so several clients can be served at once.
+
+    python daemon.py -insts large1 large2 -workers 4   # start (Ctrl-C or -stop ends it)
+    python daemon.py -status     # workers, loaded instances and their size
+    python daemon.py -stop
+
+While it runs, exec.py is a thin client: it parses its arguments, sends them
+to the daemon and prints the output of the run (exec.py -local solves in the
+client process anyway). The run writes the same .sol/.trace/.stats files,
+relative to the client's working directory. Instances that were not preloaded
+are loaded by a worker on first use and kept by that worker; an instance
+whose .in file changes is loaded again and its older version dropped. Each
+process keeps at most -cache instances and drops the least recently used one
+beyond that.
+
+Protocol: one JSON object per line and connection, answered by one JSON line.
+    {"op": "solve", "cwd": ..., "args": {exec.py arguments}}
+        -> {"output": ..., "size": ...} or {"output": ..., "error": traceback}
+    {"op": "ping"}  -> {"pid": ..., "workers": ..., "cache": ..., "instances": [...], "bytes": ...}
+    {"op": "stop"}  -> {}
+
+The socket is $SETCOVER_SOCKET, or setcover-<uid>.sock in the temp directory.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+from collections import OrderedDict
+
+SOCKET_PATH = os.environ.get('SETCOVER_SOCKET') or \
+    os.path.join(os.environ.get('TMPDIR', '/tmp'), f"setcover-{os.getuid()}.sock")
+
+# Loaded instances by (path, size, mtime), least recently used first. Filled
+# by the daemon before the pool forks (so every worker shares them) and by
+# each worker on a miss.
+_instances = OrderedDict()
+
+# Instances kept per process (set by serve() before the pool forks)
+CACHE_SIZE = 8
+_cache_size = CACHE_SIZE
+
+
+# Client
+
+def request(message, path=SOCKET_PATH):
+    """Send one request and return the reply. Raises OSError if no daemon listens on path."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(path)
+        conn.sendall((json.dumps(message) + "\n").encode())
+        with conn.makefile('r') as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionResetError(f"no reply from the daemon on {path}")
+    return json.loads(line)
+
+
+def forward(args, path=SOCKET_PATH):
+    """
+    Run a parsed exec.py command line on the daemon and print its output.
+    Returns False, without side effects, if no daemon is running.
+    """
+    try:
+        reply = request({'op': 'solve', 'cwd': os.getcwd(), 'args': vars(args)}, path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return False
+    sys.stdout.write(reply.get('output', ''))
+    if 'error' in reply:
+        sys.stderr.write(reply['error'])
+        raise SystemExit(1)
+    return True
+
+
+# Workers
+
+def _instance(filename):
+    from exec import instance_path, load_dataset
+    path = os.path.abspath(instance_path(filename))
+    st = os.stat(path)
+    key = (path, st.st_size, st.st_mtime_ns)
+    instance = _instances.get(key)
+    if instance is not None:
+        _instances.move_to_end(key)
+        return instance
+    for old in [k for k in _instances if k[0] == path]:
+        del _instances[old]  # an older version of the file
+    while len(_instances) >= _cache_size:
+        _instances.popitem(last=False)
+    instance = _instances[key] = load_dataset(path)
+    return instance
+
+
+def _nbytes(instance):
+    """Memory held by the CSR arrays of an instance."""
+    return sum(array.nbytes for array in (instance.subset_ptr, instance.subset_elems, instance.elem_ptr,
+                                          instance.elem_subsets, instance.subset_sizes, instance.degree))
+
+
+def _solve(cwd, args):
+    import contextlib
+    import io
+    import traceback
+    from exec import solve
+
+    out = io.StringIO()
+    try:
+        os.chdir(cwd)
+        args = argparse.Namespace(**args)
+        with contextlib.redirect_stdout(out):
+            result = solve(args, _instance(args.inst))
+        return {'output': out.getvalue(), 'size': len(result)}
+    except Exception:
+        return {'output': out.getvalue(), 'error': traceback.format_exc()}
+
+
+def _init_worker():
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C stops the daemon, which then shuts the pool down
+
+
+def _ready():
+    return os.getpid()
+
+
+# Server
+
+def _preload(insts):
+    # The solver modules are imported here, once, and inherited by the workers
+    import presolve, results, solvers  # noqa: F401
+    for name in solvers.names():
+        solvers.get(name).load()
+    for inst in insts:
+        instance = _instance(inst)
+        print(f"Loaded {inst}: n={instance.n}, m={instance.m}", flush=True)
+
+
+async def _handle(reader, writer, pool, stop):
+    import asyncio
+    import traceback
+
+    try:
+        message = json.loads(await reader.readline())
+        op = message.get('op')
+        if op == 'solve':
+            reply = await asyncio.get_running_loop().run_in_executor(pool, _solve, message['cwd'], message['args'])
+        elif op == 'ping':
+            reply = {'pid': os.getpid(), 'workers': pool._max_workers, 'cache': _cache_size,
+                     'instances': sorted(k[0] for k in _instances),
+                     'bytes': sum(_nbytes(instance) for instance in _instances.values())}
+        elif op == 'stop':
+            reply = {}
+            stop.set()
+        else:
+            reply = {'error': f"unknown request {op!r}\n"}
+    except Exception:
+        reply = {'error': traceback.format_exc()}
+    writer.write((json.dumps(reply) + "\n").encode())
+    await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def _serve(path, pool):
+    import asyncio
+    import signal
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    server = await asyncio.start_unix_server(lambda r, w: _handle(r, w, pool, stop), path=path)
+    print(f"Listening on {path} with {pool._max_workers} workers", flush=True)
+    async with server:
+        await stop.wait()
+
+
+def serve(insts=(), workers=None, path=SOCKET_PATH, cache=CACHE_SIZE):
+    global _cache_size
+    import asyncio
+    import multiprocessing as mp
+    from concurrent.futures import ProcessPoolExecutor
+
+    if os.path.exists(path):
+        try:
+            request({'op': 'ping'}, path)
+            raise SystemExit(f"A daemon is already listening on {path}")
+        except (ConnectionRefusedError, ConnectionResetError):
+            os.unlink(path)  # left over from a daemon that did not exit cleanly
+
+    _cache_size = max(cache, len(insts), 1)
+    _preload(insts)
+    workers = workers or os.cpu_count() or 1
+    # Fork the workers now, before the event loop and its socket exist
+    with ProcessPoolExecutor(workers, mp_context=mp.get_context('fork'), initializer=_init_worker) as pool:
+        pool.submit(_ready).result()
+        try:
+            asyncio.run(_serve(path, pool))
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+    print("Stopped", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-insts', nargs='*', default=[], help='Instances to load at start-up')
+    parser.add_argument('-workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('-socket', default=SOCKET_PATH, help='Unix socket path')
+    parser.add_argument('-cache', type=int, default=CACHE_SIZE,
+                        help='Instances kept in memory per process, least recently used dropped first')
+    parser.add_argument('-status', action='store_true', help='Report whether a daemon is running')
+    parser.add_argument('-stop', action='store_true', help='Stop the running daemon')
+    args = parser.parse_args()
+
+    if args.status or args.stop:
+        try:
+            reply = request({'op': 'stop' if args.stop else 'ping'}, args.socket)
+        except (FileNotFoundError, ConnectionRefusedError):
+            raise SystemExit(f"No daemon on {args.socket}")
+        if args.status:
+            print(f"Daemon {reply['pid']} on {args.socket}: {reply['workers']} workers, "
+                  f"{len(reply['instances'])} instances preloaded ({reply['bytes'] / 2**20:.1f} MB), "
+                  f"up to {reply['cache']} kept per process")
+            for path in reply['instances']:
+                print(f"  {path}")
+        return
+    serve(args.insts, args.workers, args.socket, args.cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""
+delta.py
+
+Incremental changes to a loaded instance and repair of an earlier cover.
+
+A Delta adds and removes subsets and elements. apply_delta does not copy the
+CSR indexes of the loaded instance: the changed instance (PatchedInstance)
+reads its rows from the loaded one, renumbered on the fly, and keeps its own
+copy only of the rows the delta changes: the subsets that lose elements, the
+elements that lose or gain subsets, and the new subsets and elements. Building
+it costs the size of these rows plus O(n + m) for the renumbering and the row
+lengths, instead of O(nnz). Consumers of the flat CSR arrays (BnB's LP bound)
+get them merged on first use.
+
+The cover of the previous instance is then carried over (Updated.repair):
+removed subsets leave it, and only the elements that may have lost their
+cover (the elements of the removed cover subsets and the new elements) are
+checked and covered greedily. Subsets made redundant by the repair are
+dropped. The repaired cover is a warm start for LS1/LS2/LS3 (initial=). The
+changed instance, the repair and the work the warm-started search has left
+all scale with the size of the change.
+
+Delta files are JSON, with 1-based indices like the .in files:
+
+    {"add_elements": 2,                      new elements n+1, n+2
+     "remove_elements": [7],                 dropped from the universe
+     "add_subsets": [[1, 5, 2001], [2002]],  may use the new elements
+     "remove_subsets": [12, 40]}
+
+Exports:
+    Delta, Updated, PatchedInstance, apply_delta(instance, delta), read_delta(path),
+    repair_cover(instance, solution, affected=None)
+"""
+
+import json
+
+import numpy as np
+
+from instance import Instance
+from LS1 import cover_greedily
+
+# Overlays stacked by applying deltas to changed instances before one is
+# merged into a plain Instance (every overlay adds a renumbering to each read)
+MAX_DEPTH = 4
+
+
+class Delta:
+    """
+    A change of an instance, with 0-based indices of the instance it applies to.
+
+    Attributes:
+        add_elements (int): number of new elements; they get the indices n, n+1, ...
+        remove_elements (list): elements dropped from the universe (and from every subset)
+        add_subsets (list): element lists of the new subsets, which may use the new elements
+        remove_subsets (list): subsets dropped from the instance
+    """
+
+    def __init__(self, add_elements=0, remove_elements=(), add_subsets=(), remove_subsets=()):
+        self.add_elements = int(add_elements)
+        self.remove_elements = [int(e) for e in remove_elements]
+        self.add_subsets = [[int(e) for e in s] for s in add_subsets]
+        self.remove_subsets = [int(j) for j in remove_subsets]
+
+    def size(self):
+        """Number of subsets and elements added or removed."""
+        return self.add_elements + len(self.remove_elements) + len(self.add_subsets) + len(self.remove_subsets)
+
+
+class Updated:
+    """
+    Result of apply_delta.
+
+    Attributes:
+        instance (Instance): the changed instance
+        subset_map (np.ndarray): new index of every original subset (-1 if removed)
+        elem_map (np.ndarray): new index of every original element and of the
+                               added ones (original n + i), -1 if removed
+        original (Instance): the instance before the change
+        delta (Delta): the change
+    """
+
+    def __init__(self, instance, subset_map, elem_map, original, delta):
+        self.instance = instance
+        self.subset_map = subset_map
+        self.elem_map = elem_map
+        self.original = original
+        self.delta = delta
+
+    def carry(self, solution):
+        """The subsets of an original cover that are still in the instance, renumbered."""
+        mapped = self.subset_map[np.asarray(solution, dtype=np.intp)]
+        return mapped[mapped >= 0].tolist()
+
+    def repair(self, solution):
+        """
+        Turn a cover of the original instance into a cover of the changed one.
+        Only the elements that may have lost their cover are checked.
+        """
+        solution = np.asarray(solution, dtype=np.intp)
+        removed = solution[self.subset_map[solution] < 0]
+        affected = np.concatenate([
+            self.elem_map[self.original.elements_of(removed)],
+            self.elem_map[self.original.n:],
+        ])
+        affected = np.unique(affected[affected >= 0])
+        return repair_cover(self.instance, self.carry(solution), affected)
+
+    def summary(self):
+        return (f"Delta: {len(self.delta.add_subsets)} subsets added, {len(self.delta.remove_subsets)} removed, "
+                f"{self.delta.add_elements} elements added, {len(self.delta.remove_elements)} removed, "
+                f"m {self.original.m} -> {self.instance.m}, n {self.original.n} -> {self.instance.n}")
+
+
+def _renumber(keep):
+    """New index of every kept entry of a bool mask, -1 for the others."""
+    index = np.full(len(keep), -1, dtype=np.intp)
+    index[keep] = np.arange(np.count_nonzero(keep))
+    return index
+
+
+class PatchedInstance(Instance):
+    """
+    An instance changed by a Delta, kept as the instance it was made from
+    (`base`) plus the rows that differ from it: the subsets that lost elements
+    and the new subsets, the elements that lost or gained subsets and the new
+    elements. Every other row is read from the base and renumbered on the fly.
+    Subset and element indices are those of the changed instance, as if it had
+    been built from scratch (kept rows in their old order, new ones last).
+
+    The row accessors and gains() work on the overlay. The flat CSR arrays
+    (subset_ptr, ..., for consumers such as BnB.LPBound) are merged from it on
+    first use, in O(nnz), and then serve every access.
+
+    Attributes:
+        base (Instance): the instance the delta was applied to
+        depth (int): number of overlays down to a plain Instance
+    """
+
+    def __init__(self, base, subset_base, elem_base, subset_map, elem_map, subset_rows, elem_rows):
+        self.base = base
+        self.depth = getattr(base, 'depth', 0) + 1
+        # Base row of every kept subset/element (None: the same index), and the
+        # new index of every base subset/element (None: the same, -1: removed)
+        self._subset_base = subset_base
+        self._elem_base = elem_base
+        self._subset_map = subset_map
+        self._elem_map = elem_map
+        # Rows that differ from the base, by new index
+        self._subset_rows = subset_rows
+        self._elem_rows = elem_rows
+
+        kept_m = base.m if subset_base is None else len(subset_base)
+        kept_n = base.n if elem_base is None else len(elem_base)
+        self.m = kept_m + sum(j >= kept_m for j in subset_rows)
+        self.n = kept_n + sum(e >= kept_n for e in elem_rows)
+        self.subset_sizes = _patched(base.subset_sizes, subset_base, self.m, subset_rows)
+        self.degree = _patched(base.degree, elem_base, self.n, elem_rows)
+        self._subset_patched = np.zeros(self.m, dtype=bool)
+        self._subset_patched[list(subset_rows)] = True
+        self._elem_patched = np.zeros(self.n, dtype=bool)
+        self._elem_patched[list(elem_rows)] = True
+        self._flat = None
+
+    def compact(self):
+        """The same instance as a plain Instance with flat CSR arrays (built once)."""
+        if self._flat is None:
+            subset_ptr = np.zeros(self.m + 1, dtype=np.int64)
+            np.cumsum(self.subset_sizes, out=subset_ptr[1:])
+            elem_ptr = np.zeros(self.n + 1, dtype=np.int64)
+            np.cumsum(self.degree, out=elem_ptr[1:])
+            self._flat = Instance(self.n, subset_ptr, self.elements_of(np.arange(self.m)),
+                                  elem_ptr, self.subsets_of_elements(np.arange(self.n)))
+        return self._flat
+
+    subset_ptr = property(lambda self: self.compact().subset_ptr)
+    subset_elems = property(lambda self: self.compact().subset_elems)
+    elem_ptr = property(lambda self: self.compact().elem_ptr)
+    elem_subsets = property(lambda self: self.compact().elem_subsets)
+
+    def elements(self, j):
+        if self._flat is not None:
+            return self._flat.elements(j)
+        row = self._subset_rows.get(int(j))
+        if row is not None:
+            return row
+        row = self.base.elements(j if self._subset_base is None else self._subset_base[j])
+        return row if self._elem_map is None else self._elem_map[row]
+
+    def subsets_of(self, e):
+        if self._flat is not None:
+            return self._flat.subsets_of(e)
+        row = self._elem_rows.get(int(e))
+        if row is not None:
+            return row
+        row = self.base.subsets_of(e if self._elem_base is None else self._elem_base[e])
+        return row if self._subset_map is None else self._subset_map[row]
+
+    def elements_of(self, subset_ids):
+        if self._flat is not None:
+            return self._flat.elements_of(subset_ids)
+        return _rows(subset_ids, self.subset_sizes, self._subset_patched, self._subset_rows,
+                     self._subset_base, self.base.elements_of, self._elem_map)
+
+    def subsets_of_elements(self, elems):
+        if self._flat is not None:
+            return self._flat.subsets_of_elements(elems)
+        return _rows(elems, self.degree, self._elem_patched, self._elem_rows,
+                     self._elem_base, self.base.subsets_of_elements, self._subset_map)
+
+    def gains(self, uncovered):
+        if self._flat is not None:
+            return self._flat.gains(uncovered)
+        uncovered = np.asarray(uncovered)
+        if uncovered.dtype != bool or 4 * np.count_nonzero(uncovered) < self.n:
+            return super().gains(uncovered)  # through subsets_of_elements
+        # Dense: the gains of the base rows for the same elements (removed ones
+        # count as covered), then the rows of the overlay
+        if self._elem_map is None:
+            base_uncovered = uncovered[:self.base.n]
+        else:
+            base_uncovered = uncovered[self._elem_map] & (self._elem_map >= 0)
+        base_gains = self.base.gains(base_uncovered)
+        gains = np.zeros(self.m, dtype=np.intp)
+        kept = base_gains if self._subset_base is None else base_gains[self._subset_base]
+        gains[:len(kept)] = kept
+        patched = np.flatnonzero(self._subset_patched)
+        owner = np.repeat(np.arange(len(patched)), self.subset_sizes[patched])
+        gains[patched] = np.bincount(owner, weights=uncovered[self.elements_of(patched)], minlength=len(patched))
+        return gains
+
+
+def _patched(counts, base_index, length, rows):
+    """Row lengths of an overlay: those of the base rows, then of the rows that differ."""
+    patched = np.zeros(length, dtype=np.int64)
+    kept = counts if base_index is None else counts[base_index]
+    patched[:len(kept)] = kept
+    for i, row in rows.items():
+        patched[i] = len(row)
+    return patched
+
+
+def _rows(ids, lengths, patched, rows, base_index, gather, renumber):
+    """
+    Concatenated rows `ids` of an overlay: the rows that differ from the base
+    are taken from `rows`, the others gathered from the base in one call and
+    renumbered.
+    """
+    ids = np.asarray(ids, dtype=np.intp)
+    hit = patched[ids]
+    plain = ids[~hit]
+    part = gather(plain if base_index is None else base_index[plain])
+    if renumber is not None:
+        part = renumber[part]
+    if not hit.any():
+        return part
+    lens = lengths[ids]
+    ends = np.cumsum(lens)
+    out = np.empty(int(ends[-1]), dtype=np.intp)
+    out[~np.repeat(hit, lens)] = part
+    for k in np.flatnonzero(hit).tolist():
+        out[ends[k] - lens[k]:ends[k]] = rows[int(ids[k])]
+    return out
+
+
+def apply_delta(instance, delta):
+    """
+    Apply a Delta to an instance. Raises ValueError for indices out of range
+    or if some element of the changed instance is not covered by any subset.
+    The changed instance is a PatchedInstance over `instance`.
+    """
+    original = instance
+    if getattr(instance, 'depth', 0) >= MAX_DEPTH:
+        instance = instance.compact()
+    n, m = instance.n, instance.m
+    total = n + delta.add_elements
+    remove_subsets = np.unique(np.asarray(delta.remove_subsets, dtype=np.intp))
+    remove_elements = np.unique(np.asarray(delta.remove_elements, dtype=np.intp))
+    if len(remove_subsets) and (remove_subsets[0] < 0 or remove_subsets[-1] >= m):
+        raise ValueError("Removed subset out of range")
+    if len(remove_elements) and (remove_elements[0] < 0 or remove_elements[-1] >= n):
+        raise ValueError("Removed element out of range")
+    for s in delta.add_subsets:
+        if s and (min(s) < 0 or max(s) >= total):
+            raise ValueError("Element of an added subset out of range")
+
+    keep_subset = np.ones(m, dtype=bool)
+    keep_subset[remove_subsets] = False
+    keep_elem = np.ones(total, dtype=bool)
+    keep_elem[remove_elements] = False
+    subset_map = _renumber(keep_subset)
+    elem_map = _renumber(keep_elem)
+    kept_m = m - len(remove_subsets)
+    kept_n = n - len(remove_elements)
+
+    # Renumbering of the base rows, left out where nothing is removed
+    subset_base = np.flatnonzero(keep_subset) if len(remove_subsets) else None
+    elem_base = np.flatnonzero(keep_elem[:n]) if len(remove_elements) else None
+    base_subset_map = subset_map if len(remove_subsets) else None
+    base_elem_map = elem_map[:n] if len(remove_elements) else None
+
+    # subset -> elements: the kept subsets that lose elements, then the new subsets
+    subset_rows = {}
+    for j in np.unique(instance.subsets_of_elements(remove_elements)).tolist():
+        if keep_subset[j]:
+            row = elem_map[instance.elements(j)]
+            subset_rows[int(subset_map[j])] = row[row >= 0]
+    for i, s in enumerate(delta.add_subsets):
+        row = np.unique(elem_map[np.asarray(s, dtype=np.intp)])
+        subset_rows[kept_m + i] = row[row >= 0]
+
+    # element -> subsets: the kept elements that lose subsets or are in new
+    # subsets, and the new elements. Rows stay in ascending subset order, the
+    # new subsets coming last.
+    added = {}
+    for i, s in enumerate(delta.add_subsets):
+        for e in subset_rows[kept_m + i].tolist():
+            added.setdefault(e, []).append(kept_m + i)
+    gaining = np.array([e for e in added if e < kept_n], dtype=np.intp)
+    losing = np.unique(instance.elements_of(remove_subsets))
+    elem_rows = {}
+    for e in np.union1d(losing[keep_elem[losing]], gaining if elem_base is None else elem_base[gaining]).tolist():
+        row = subset_map[instance.subsets_of(e)]
+        elem_rows[int(elem_map[e])] = row[row >= 0]
+    for e in range(kept_n, kept_n + delta.add_elements):
+        elem_rows[e] = np.zeros(0, dtype=np.intp)
+    for e, new in added.items():
+        elem_rows[e] = np.concatenate([elem_rows[e], np.array(new, dtype=np.intp)])
+
+    for e, row in elem_rows.items():
+        if not len(row):
+            label = int(np.flatnonzero(elem_map == e)[0])
+            raise ValueError(f"Element {label + 1} is not covered by any subset")
+
+    changed = PatchedInstance(instance, subset_base, elem_base, base_subset_map, base_elem_map, subset_rows, elem_rows)
+    return Updated(changed, subset_map, elem_map, original, delta)
+
+
+def _cover_counts(instance, in_cover, elems):
+    """Number of cover subsets containing each of the elements."""
+    subsets = instance.subsets_of_elements(elems)
+    row = np.repeat(np.arange(len(elems)), instance.degree[elems])
+    return np.bincount(row, weights=in_cover[subsets], minlength=len(elems)).astype(np.int64)
+
+
+def _cover_missing(instance, missing):
+    """
+    Subsets covering the (sorted) `missing` elements, chosen greedily among the
+    subsets containing any of them: the greedy of LS1 on the small instance of
+    these elements and subsets, which picks the same subsets as on the whole one.
+    """
+    subsets = instance.subsets_of_elements(missing)
+    candidates, owner = np.unique(subsets, return_inverse=True)
+    order = np.argsort(owner, kind='stable')
+    local_ptr = np.zeros(len(candidates) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(owner, minlength=len(candidates)), out=local_ptr[1:])
+    local_elems = np.repeat(np.arange(len(missing)), instance.degree[missing])[order]
+    local = Instance(len(missing), local_ptr, local_elems)
+    return candidates[cover_greedily(local, [], np.ones(len(missing), dtype=bool))].tolist()
+
+
+def repair_cover(instance, solution, affected=None):
+    """
+    Complete `solution` to a cover of the instance. Only the elements in
+    `affected` can be uncovered (None: any element). Missing elements are
+    covered greedily by the subset containing most of them; cover subsets
+    made redundant by the added ones are dropped. Returns a sorted list.
+    Apart from clearing two masks, the work is local to the affected elements
+    and the subsets around them.
+    """
+    in_cover = np.zeros(instance.m, dtype=bool)
+    in_cover[np.asarray(solution, dtype=np.intp)] = True
+    if affected is None:
+        affected = np.arange(instance.n)
+    affected = np.asarray(affected, dtype=np.intp)
+    missing = np.unique(affected[_cover_counts(instance, in_cover, affected) == 0])
+    added = _cover_missing(instance, missing) if len(missing) else []
+    in_cover[added] = True
+
+    if added:
+        touched = np.zeros(instance.m, dtype=bool)
+        touched[instance.subsets_of_elements(instance.elements_of(added))] = True
+        touched = np.flatnonzero(touched & in_cover)
+        # Coverage counts of the elements of the candidates only, updated on every drop
+        elems = np.zeros(instance.n, dtype=bool)
+        elems[instance.elements_of(touched)] = True
+        elems = np.flatnonzero(elems)
+        count = np.zeros(instance.n, dtype=np.int64)
+        count[elems] = _cover_counts(instance, in_cover, elems)
+        for idx in touched.tolist():
+            row = instance.elements(idx)
+            if (count[row] > 1).all():
+                in_cover[idx] = False
+                count[row] -= 1
+    return np.flatnonzero(in_cover).tolist()
+
+
+def read_delta(path):
+    """Read a JSON delta file (1-based indices)."""
+    with open(path, 'r') as f:
+        spec = json.load(f)
+    return Delta(
+        add_elements=spec.get('add_elements', 0),
+        remove_elements=[e - 1 for e in spec.get('remove_elements', [])],
+        add_subsets=[[e - 1 for e in s] for s in spec.get('add_subsets', [])],
+        remove_subsets=[j - 1 for j in spec.get('remove_subsets', [])],
+    )
@@ -1,66 +1,270 @@
 import argparse
+import json
+import os
 import random
+import resource
 import time
 
-from LS1 import simulated_annealing
-from LS2 import hill_climbing_min_set_cover
-from Approx import greedy_set_cover
-from BnB import branch_and_bound_min_set_cover
+import daemon
+import solvers
+from schedule import SCHEDULES
 
-def load_dataset(filename):
+# The solvers (and NumPy/SciPy) are imported when a run needs them (see
+# solvers.py), so that forwarding a run to the solver daemon (daemon.py) or
+# a quick Approx run starts fast.
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+OUTPUT_DIR = "../output"
+STRATEGIES = ('dfs', 'best-first', 'best-dive')  # BnB.BranchAndBound.strategies
+
+def instance_path(filename):
+    """Path of an instance given by name (e.g. 'small1' or 'small1.in', looked up in data/) or by path."""
+    if os.path.exists(filename):
+        return filename
     if '.' in filename:
         filename = filename.split('.')[0]
-        
-    with open("../data/"+filename+".in", 'r') as f:
-        lines = f.readlines()
-    n, _ = list(map(int, lines[0].strip().split(" ")))
-    universe = set(range(1, n + 1))
-    subsets = [set(map(int, line.strip().split(" ")[1:])) for line in lines[1:]]
+    return os.path.join(DATA_DIR, filename + ".in")
+
+def load_dataset(filename, cache=True, mmap=False):
+    """
+    Load an instance by name or path (see instance_path) through the binary
+    instance cache. With mmap the CSR arrays are memory-mapped from the cache
+    instead of read into memory.
+    """
+    from instance import read_instance
+    return read_instance(instance_path(filename), cache, mmap)
 
-    return universe, subsets
+def memory_usage():
+    """
+    Peak resident set size of this process, plus the current split between
+    anonymous memory and file-backed (memory-mapped) pages where /proc is
+    available. Mapped pages can be dropped by the kernel under pressure.
+    """
+    report = f"Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB"
+    try:
+        with open('/proc/self/status', 'r') as f:
+            status = dict(line.split(':', 1) for line in f if ':' in line)
+        anon, mapped = (int(status[k].split()[0]) / 1024 for k in ('RssAnon', 'RssFile'))
+        report += f" (now: {anon:.1f} MB anonymous, {mapped:.1f} MB file-backed)"
+    except (OSError, KeyError, ValueError):
+        pass
+    return report
+
+def _write_replace(path, text):
+    """Write a file under a temporary name and move it into place, so it is never seen half-written."""
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
 
 def save_dataset(filename, result, intermediate_results):
+    """
+    Write the .sol and .trace files of a run. The .trace is moved into place
+    last, so a run with a .trace file also has its .sol (see batch.is_done).
+    """
+    base = OUTPUT_DIR+"/"+filename
+    _write_replace(base+".sol", f"{len(result)}\n" + " ".join(str(s+1) for s in result))
+    _write_replace(base+".trace", "".join(f"{s[0]} {s[1]}\n" for s in intermediate_results))
 
-    with open("../output/"+filename+".sol", 'w') as f:
-        f.write(f"{len(result)}\n")
-        f.write(" ".join(str(s+1) for s in result))
-    
-    with open("../output/"+filename+".trace", 'w') as f:
-        for s in intermediate_results:
-            f.write(f"{s[0]} {s[1]}\n")
-    return
+def load_solution(path):
+    """Cover of a .sol file, as 0-based subset indices."""
+    with open(path, 'r') as f:
+        f.readline()
+        return [int(s) - 1 for s in f.readline().split()]
 
-def main():
+def save_stats(filename, stats):
+    """Write the counters and timers of a profiled run as JSON next to its .trace."""
+    with open(OUTPUT_DIR+"/"+filename+".stats", 'w') as f:
+        json.dump(stats, f, indent=1, sort_keys=True)
+
+def load_optimum(inst):
+    """Optimal (or best known) cover size of an instance, from data/<inst>.out."""
+    with open(os.path.join(DATA_DIR, inst + ".out"), 'r') as f:
+        return int(f.readline().strip())
+
+def solution_name(inst, alg, cutoff, seed):
+    """Base name of the .sol/.trace files of a run (the seed only matters for seeded algorithms)."""
+    if solvers.seeded(alg):
+        return f"{inst}_{alg}_{cutoff}_{seed}"
+    return f"{inst}_{alg}_{cutoff}"
+
+def store_trace(inst, alg, cutoff, seed, trace):
+    """Add a run to the results store output/<inst>.sqlite (see results.py), seeded like its files."""
+    from results import append_run
+    append_run(inst, alg, cutoff, seed if solvers.seeded(alg) else 0, trace, OUTPUT_DIR)
+
+def run_algorithm(instance, alg, cutoff, seed, bound='tiered', strategy='dfs', max_nodes=100000,
+                  incumbent=None, verbose=False, stats=None, schedule='geometric',
+                  target=None, stall=None, cancel=None, callbacks=(), workers=1, initial=None):
+    """
+    Run one algorithm on an instance.
+    Returns (result, intermediate_results): 0-based subset indices and the (time, size) trace.
+    incumbent is an optional shared incumbent (see portfolio.py).
+    stats: optional dict that receives the per-phase counters and timers of the
+    run (timers end in _time, in seconds). 'iterations' is the unit of work of
+    every solver: greedy steps, SA moves, LS2 swaps evaluated, LS3 swaps or BnB nodes
+    expanded. Without it the solvers skip their timers.
+    schedule: LS1 temperature schedule (see schedule.py).
+    target, stall, cancel, callbacks: early termination and incumbent callbacks
+    (see termination.py); the run still ends at the cutoff at the latest.
+    workers: BnB worker processes; more than one searches the subtrees in
+    parallel (see BnB.ParallelBranchAndBound).
+    initial: a cover of the instance to warm-start from: the start of LS1/LS2/LS3
+    and the initial upper bound of BnB, used instead of their own start cover
+    (see LS1.start_cover).
+    """
+    from termination import Termination
+
+    random.seed(seed)
+
+    if instance.n == 0:
+        # nothing left to cover (e.g. presolve already fixed the whole cover)
+        return [], [(0.0, 0)]
+
+    # Import the solver before the clock starts: the SciPy import of BnB alone
+    # can take longer than a short cutoff
+    solver = solvers.get(alg)
+    module = solver.load()
+
+    callbacks = list(callbacks)
+    if incumbent is not None:
+        callbacks.append(lambda elapsed, size, solution: incumbent.offer(size))
+    termination = Termination(cutoff, target, stall, cancel, callbacks)
+
+    options = {'bound': bound, 'strategy': strategy, 'max_nodes': max_nodes, 'schedule': schedule,
+               'workers': workers, 'incumbent': incumbent, 'verbose': verbose, 'initial': initial}
+    result, intermediate_results = solver.run(instance, cutoff, seed, termination, stats, options, module)
+
+    if stats is not None:
+        stats.update(termination.statistics())
+    return result, intermediate_results
+
+def parse_args(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument('-inst', required=True, help='Input filename')
-    parser.add_argument('-alg', required=True, choices=['BnB', 'Approx', 'LS1', 'LS2'])
+    parser.add_argument('-alg', required=True, choices=solvers.names())
     parser.add_argument('-time', required=True, type=float, help='Cutoff time in seconds')
     parser.add_argument('-seed', required=True, type=int, help='Random seed')
-    args = parser.parse_args()
+    parser.add_argument('-bound', default='tiered', choices=['tiered', 'lp'], help='BnB bounding mode')
+    parser.add_argument('-strategy', default='dfs', choices=STRATEGIES, help='BnB node ordering')
+    parser.add_argument('-max_nodes', default=100000, type=int, help='BnB open-node memory budget')
+    parser.add_argument('-workers', default=1, type=int, help='BnB worker processes (parallel subtree search)')
+    parser.add_argument('-presolve', action='store_true', help='Reduce the instance before solving')
+    parser.add_argument('-mmap', action='store_true', help='Memory-map the instance from its binary cache (out-of-core)')
+    parser.add_argument('-schedule', default='geometric', choices=SCHEDULES,
+                        help='LS1 temperature schedule: geometric (fixed per-move cooling) or adaptive')
+    parser.add_argument('-target', help="Stop once a cover of at most this size is found ('opt': the .out optimum)")
+    parser.add_argument('-stall', type=float, help='Stop after this many seconds without a better cover')
+    parser.add_argument('-profile', action='store_true', help='Write per-phase counters and timers to a .stats file')
+    parser.add_argument('-store', action='store_true', help='Also add the run to the results store output/<inst>.sqlite')
+    parser.add_argument('-delta', help='JSON file of subsets/elements to add or remove before solving (see delta.py)')
+    parser.add_argument('-initial', help='.sol file of an earlier run to warm-start LS1/LS2/LS3 from '
+                                         '(with -delta: a cover of the instance before the change)')
+    parser.add_argument('-warm', action='store_true',
+                        help='Start from the best known cover of the instance and store the cover of the run if it is '
+                             'better (see incumbents.py)')
+    parser.add_argument('-local', action='store_true', help='Solve in this process even if the solver daemon is running')
+    args = parser.parse_args(argv)
+    if args.presolve and (args.delta or args.initial or args.warm):
+        parser.error("-presolve cannot be combined with -delta, -initial or -warm")
+    if args.delta and args.target == 'opt':
+        parser.error("-target opt is the optimum of the unchanged instance; give a size with -delta")
+    return args
 
-    random.seed(args.seed)
+def solve(args, instance=None):
+    """
+    Run the experiment described by the parsed arguments and write its output
+    files. instance: the already loaded instance (the daemon keeps them in
+    memory); otherwise it is loaded here. Returns the cover as 0-based
+    subset indices of the original instance.
+    """
+    # outputs are named after the instance, also when it is given as a path
+    inst = os.path.basename(args.inst)
+    if inst.endswith('.in'):
+        inst = inst[:-3]
+    target = None
+    if args.target is not None:
+        target = load_optimum(inst) if args.target == 'opt' else int(args.target)
 
-    universe, subsets = load_dataset(args.inst) 
+    stats = {} if args.profile else None
+    t0 = time.perf_counter()
+    if instance is None:
+        instance = load_dataset(args.inst, mmap=args.mmap)
+    initial = load_solution(args.initial) if args.initial else None
+    if args.delta:
+        from delta import apply_delta, read_delta
+        updated = apply_delta(instance, read_delta(args.delta))
+        print(updated.summary())
+        instance = updated.instance
+        inst += '+' + os.path.splitext(os.path.basename(args.delta))[0]  # outputs of the changed instance
+        if initial is not None:
+            initial = updated.repair(initial)
+    elif initial is not None:
+        from delta import repair_cover
+        initial = repair_cover(instance, initial)
+    if args.warm:
+        import incumbents
+        key = incumbents.fingerprint(instance_path(args.inst), args.delta)
+        known = incumbents.best(key)
+        if known is not None:
+            # The solvers take the cover as it is, so a stored cover (of a short
+            # run, say) only replaces the given cover or the greedy one if it is
+            # not larger
+            if initial is None:
+                from Approx import greedy_set_cover
+                rival, _ = greedy_set_cover(instance)
+            else:
+                rival = initial
+            if len(known) <= len(rival):
+                print(f"Best known cover: {len(known)} subsets")
+                initial = known
+    t1 = time.perf_counter()
 
-    if args.alg == 'BnB':
-        result, intermediate_results = branch_and_bound_min_set_cover(universe, subsets, args.time)
-        solution_filename = f"{args.inst}_{args.alg}_{args.time}"
-        pass
-    elif args.alg == 'Approx':
-        result, timeSpent = greedy_set_cover(universe, subsets)
-        intermediate_results = [(timeSpent, len(result))] # To prevent code errors (Approx doesn't require trace file)
-        solution_filename = f"{args.inst}_{args.alg}_{args.time}"
-        pass
-    elif args.alg == 'LS1':
-        result, intermediate_results = simulated_annealing(universe, subsets, args.time, args.seed)
-        solution_filename = f"{args.inst}_{args.alg}_{args.time}_{args.seed}"
-    elif args.alg == 'LS2':
-        result, intermediate_results = hill_climbing_min_set_cover(universe, subsets, args.time)
-        solution_filename = f"{args.inst}_{args.alg}_{args.time}_{args.seed}"
-    else:
-        print(f"Algorithm '{args.alg}' is not implemented in this file.")
+    presolved = None
+    if args.presolve:
+        from presolve import presolve
+        presolved = presolve(instance)
+        print(presolved.summary())
+        instance = presolved.instance
+        if target is not None:
+            target -= len(presolved.fixed)  # the fixed subsets are added back to every cover
+    t2 = time.perf_counter()
+
+    result, intermediate_results = run_algorithm(
+        instance, args.alg, args.time, args.seed,
+        args.bound, args.strategy, args.max_nodes, verbose=True, stats=stats, schedule=args.schedule,
+        target=target, stall=args.stall, workers=args.workers, initial=initial
+    )
+    t3 = time.perf_counter()
+
+    if presolved is not None:
+        # back to the original 1-based subset indices in the .sol file
+        result = presolved.expand(result)
+        intermediate_results = presolved.expand_trace(intermediate_results)
 
-    save_dataset(solution_filename, result, intermediate_results)
+    if args.warm and incumbents.offer(key, result, instance, f"{args.alg} seed {args.seed}"):
+        print(f"New best known cover ({len(result)} subsets)")
+
+    name = solution_name(inst, args.alg, args.time, args.seed)
+    save_dataset(name, result, intermediate_results)
+    if args.store:
+        store_trace(inst, args.alg, args.time, args.seed, intermediate_results)
+    if stats is not None:
+        stats.update(inst=inst, alg=args.alg, cutoff=args.time, seed=args.seed, size=len(result),
+                     load_time=t1 - t0, presolve_time=t2 - t1, solve_time=t3 - t2,
+                     peak_rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+        save_stats(name, stats)
+    if args.mmap:
+        print(memory_usage())
+    return result
+
+def main():
+    args = parse_args()
+    # With the daemon running, this process is only a client: the daemon has
+    # the instance in memory and the solvers imported (out-of-core runs stay local)
+    if not args.local and not args.mmap and daemon.forward(args):
+        return
+    solve(args)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,153 @@
+"""
+incumbents.py
+
+Best known covers, kept across runs.
+
+Covers are stored by instance fingerprint, the SHA-256 of the .in file (for a
+run with -delta, of the .in file and the delta file), so a renamed or copied
+instance finds its covers and a changed file does not get stale ones. The
+fingerprint of a file is remembered by path, size and modification time, so
+an unchanged instance is not hashed again.
+
+The store is one SQLite file, output/incumbents.sqlite, like the results
+store (results.py). offer() checks that the cover covers the instance and
+only replaces a cover with a smaller one, in a single statement, so
+concurrent exec.py -warm runs (in several shells or on the daemon's
+workers) cannot overwrite a better cover with a worse one.
+
+exec.py -warm hands the stored cover to the solver, which starts from it
+(LS1/LS2/LS3) or takes its size as the initial upper bound (BnB), unless it
+is larger than the -initial cover or, without one, the greedy cover. The
+cover of the run is offered back:
+
+    python exec.py -inst large1 -alg LS1 -time 30 -seed 1 -warm
+    python incumbents.py -inst large1        # best known cover of an instance
+
+Exports:
+    fingerprint(path, delta=None), best(key), offer(key, cover, instance, source)
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+STORE = "../output/incumbents.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS incumbents (
+    fingerprint TEXT    PRIMARY KEY,
+    size        INTEGER NOT NULL,
+    cover       BLOB    NOT NULL,
+    source      TEXT,
+    updated     REAL    NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    path        TEXT    PRIMARY KEY,
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    sha256      TEXT    NOT NULL
+);
+"""
+
+
+def _connect(store):
+    conn = sqlite3.connect(store, timeout=60)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(path, delta=None, store=STORE):
+    """Content hash of an instance file (combined with the delta file, if any)."""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    conn = _connect(store)
+    try:
+        row = conn.execute("SELECT sha256 FROM fingerprints WHERE path = ? AND size = ? AND mtime_ns = ?",
+                           (path, st.st_size, st.st_mtime_ns)).fetchone()
+        if row is None:
+            row = (_sha256(path),)
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?)",
+                             (path, st.st_size, st.st_mtime_ns, row[0]))
+    finally:
+        conn.close()
+    if delta is None:
+        return row[0]
+    return hashlib.sha256((row[0] + _sha256(delta)).encode()).hexdigest()
+
+
+def best(key, store=STORE):
+    """Best known cover (0-based subset indices) for a fingerprint, None if there is none."""
+    if not os.path.exists(store):
+        return None
+    conn = _connect(store)
+    try:
+        row = conn.execute("SELECT cover FROM incumbents WHERE fingerprint = ?", (key,)).fetchone()
+    finally:
+        conn.close()
+    return None if row is None else np.frombuffer(row[0], dtype=np.int64).tolist()
+
+
+def offer(key, cover, instance, source=None, store=STORE):
+    """
+    Store the cover if it is smaller than the best known one. Returns True if
+    it was stored. Raises ValueError if it is not a cover of `instance`, the
+    instance the fingerprint was taken of.
+    """
+    cover = np.unique(np.asarray(cover, dtype=np.int64))
+    if len(cover) and (cover[0] < 0 or cover[-1] >= instance.m):
+        raise ValueError("Subset of the cover out of range")
+    covered = np.bincount(instance.elements_of(cover), minlength=instance.n)
+    if not covered.all():
+        raise ValueError(f"Not a cover: element {int(np.argmin(covered)) + 1} is not covered")
+    conn = _connect(store)
+    try:
+        with conn:
+            changed = conn.execute(
+                "INSERT INTO incumbents VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(fingerprint) DO UPDATE SET size = excluded.size, cover = excluded.cover, "
+                "source = excluded.source, updated = excluded.updated WHERE excluded.size < incumbents.size",
+                (key, len(cover), cover.tobytes(), source, time.time())).rowcount
+    finally:
+        conn.close()
+    return changed > 0
+
+
+def main():
+    from exec import instance_path
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-inst', required=True, help='Instance name or path')
+    parser.add_argument('-delta', help='Delta file the cover was found with (see delta.py)')
+    parser.add_argument('-store', default=STORE, help='Incumbent store')
+    args = parser.parse_args()
+
+    key = fingerprint(instance_path(args.inst), args.delta, args.store)
+    conn = _connect(args.store)
+    try:
+        row = conn.execute("SELECT size, source, updated FROM incumbents WHERE fingerprint = ?", (key,)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        print(f"No cover stored for {args.inst} ({key[:12]})")
+    else:
+        size, source, updated = row
+        print(f"{args.inst} ({key[:12]}): {size} subsets, by {source or '?'} on "
+              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(updated))}")
+        print(" ".join(str(j + 1) for j in best(key, args.store)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+instance.py
+
+Compact, array-backed representation of a Minimum Set Cover instance that is
+built once and shared by all solvers (Approx, BnB, LS1, LS2).
+
+Elements are relabelled 0..n-1 and subsets 0..m-1. The incidence is stored
+twice in CSR form as NumPy arrays:
+    subset_ptr, subset_elems   subset  -> elements  (row j is subset_elems[subset_ptr[j]:subset_ptr[j+1]])
+    elem_ptr, elem_subsets     element -> subsets   (row e is elem_subsets[elem_ptr[e]:elem_ptr[e+1]])
+
+Instance files are parsed by a streaming parser that fills the arrays in bulk,
+and the CSR arrays are cached in binary form next to the .in file
+(<file>.in.cache/, one .npy per array). The cache is reused as long as the
+size and modification time of the .in file are unchanged.
+
+For instances that do not fit in memory, the cache can be built out of core
+and memory-mapped (read_instance(path, mmap=True)); the solvers then only keep
+O(n + m) arrays of their own in memory.
+
+Exports:
+    Instance
+    read_instance(path, cache=True, mmap=False)
+    parse_instance(path)
+    build_cache(path)
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+# Arrays stored in the binary cache
+CACHE_ARRAYS = ('subset_ptr', 'subset_elems', 'elem_ptr', 'elem_subsets')
+
+
+class Instance:
+    """
+    Set cover instance in CSR form.
+
+    Attributes:
+        n (int): number of elements in the universe
+        m (int): number of subsets
+        subset_ptr, subset_elems (np.ndarray): subset -> elements incidence
+        elem_ptr, elem_subsets (np.ndarray): element -> subsets incidence
+        subset_sizes (np.ndarray): |S_j| for every subset
+        degree (np.ndarray): number of subsets containing each element
+    """
+
+    def __init__(self, n, subset_ptr, subset_elems, elem_ptr=None, elem_subsets=None):
+        self.n = int(n)
+        self.subset_ptr = np.asarray(subset_ptr, dtype=np.int64)
+        # Indices are kept as intp so fancy indexing with them needs no conversion
+        self.subset_elems = np.asarray(subset_elems, dtype=np.intp)
+        self.m = len(self.subset_ptr) - 1
+        self.subset_sizes = np.diff(self.subset_ptr)
+
+        if elem_ptr is None:
+            # Transpose by a stable counting sort on the element id
+            owner = np.repeat(np.arange(self.m, dtype=np.intp), self.subset_sizes)
+            order = np.argsort(self.subset_elems, kind='stable')
+            elem_subsets = owner[order]
+            elem_ptr = np.zeros(self.n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.subset_elems, minlength=self.n), out=elem_ptr[1:])
+        self.elem_ptr = np.asarray(elem_ptr, dtype=np.int64)
+        self.elem_subsets = np.asarray(elem_subsets, dtype=np.intp)
+        self.degree = np.diff(self.elem_ptr)
+
+        self._nonempty = None
+
+    @classmethod
+    def from_sets(cls, universe, subsets):
+        """
+        Build an instance from a universe and a list of Python sets.
+        Universe elements are relabelled 0..n-1 in sorted order; elements of a
+        subset that are not in the universe are ignored.
+        """
+        label = {e: i for i, e in enumerate(sorted(universe))}
+        rows = [sorted(label[e] for e in s if e in label) for s in subsets]
+        subset_ptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(r) for r in rows], out=subset_ptr[1:])
+        subset_elems = np.fromiter((e for r in rows for e in r), dtype=np.intp, count=subset_ptr[-1])
+        return cls(len(label), subset_ptr, subset_elems)
+
+    def elements(self, j):
+        """Elements of subset j (a view into subset_elems)."""
+        return self.subset_elems[self.subset_ptr[j]:self.subset_ptr[j + 1]]
+
+    def subsets_of(self, e):
+        """Subsets containing element e (a view into elem_subsets)."""
+        return self.elem_subsets[self.elem_ptr[e]:self.elem_ptr[e + 1]]
+
+    def elements_of(self, subset_ids):
+        """Concatenated elements of several subsets (with repetitions)."""
+        return _gather(self.subset_ptr, self.subset_elems, subset_ids)
+
+    def subsets_of_elements(self, elems):
+        """Concatenated subsets containing several elements (with repetitions)."""
+        return _gather(self.elem_ptr, self.elem_subsets, elems)
+
+    def gains(self, uncovered):
+        """
+        Marginal gain |S_j ∩ U| of every subset for the uncovered elements U,
+        as an int array of length m, computed in one batched pass.
+
+        `uncovered` is a bool mask over the elements or an array of element ids.
+        Few uncovered elements are counted through the element -> subsets index
+        (cost proportional to their degrees); a dense mask is summed along the
+        subset rows with one reduceat over the incidence (cost O(nnz)).
+        """
+        uncovered = np.asarray(uncovered)
+        if uncovered.dtype == bool:
+            if 4 * np.count_nonzero(uncovered) >= self.n:
+                if self._nonempty is None:
+                    self._nonempty = np.flatnonzero(self.subset_sizes)
+                gains = np.zeros(self.m, dtype=np.intp)
+                if len(self._nonempty):
+                    gains[self._nonempty] = np.add.reduceat(
+                        uncovered[self.subset_elems], self.subset_ptr[self._nonempty], dtype=np.intp)
+                return gains
+            uncovered = np.flatnonzero(uncovered)
+        return np.bincount(self.subsets_of_elements(uncovered), minlength=self.m)
+
+
+def _gather(ptr, idx, rows):
+    """Concatenate the CSR rows idx[ptr[r]:ptr[r+1]] for every r in rows."""
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = ptr[rows]
+    lens = ptr[rows + 1] - starts
+    total = int(lens.sum())
+    if total == 0:
+        return idx[:0]
+    # Position of every gathered entry: row start plus its offset inside the row
+    offsets = np.repeat(starts - np.cumsum(lens) + lens, lens) + np.arange(total)
+    return idx[offsets]
+
+
+def _scan(path, chunk_size):
+    """
+    Stream an instance file:
+        n m
+        size e1 e2 ... (one line per subset, 1-based elements)
+
+    Yields (header, sizes, elements) per chunk of the file: the [n, m] header
+    (filled once read), the sizes of the subsets starting in the chunk and the
+    element tokens of the chunk. Every chunk is converted to integers in one
+    NumPy call and only the subset sizes are walked in Python.
+    """
+    header = []
+    need = 0  # elements still to read for the current subset
+    rest = b''
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(chunk_size)
+            data = rest + block
+            if block:
+                # Only convert up to the last whitespace; a number may be split
+                cut = max(data.rfind(b' '), data.rfind(b'\n'))
+                if cut < 0:
+                    rest = data
+                    continue
+                data, rest = data[:cut], data[cut:]
+            tokens = np.fromstring(data, dtype=np.int64, sep=' ') if data.strip() else np.empty(0, np.int64)
+
+            keep = np.ones(len(tokens), dtype=bool)
+            sizes = []
+            i = 0
+            while len(header) < 2 and i < len(tokens):
+                header.append(int(tokens[i]))
+                keep[i] = False
+                i += 1
+            while i < len(tokens):
+                if need == 0:
+                    need = int(tokens[i])
+                    sizes.append(need)
+                    keep[i] = False
+                    i += 1
+                else:
+                    take = min(need, len(tokens) - i)
+                    i += take
+                    need -= take
+            yield header, sizes, tokens[keep]
+            if not block:
+                break
+
+
+def parse_instance(path, chunk_size=1 << 22):
+    """
+    Parse an instance file into memory. The cost is O(m) interpreter steps
+    plus bulk conversion of the elements.
+    """
+    sizes = []
+    parts = []
+    for header, chunk_sizes, elems in _scan(path, chunk_size):
+        sizes.extend(chunk_sizes)
+        parts.append(elems)
+
+    n, m = header
+    if len(sizes) != m:
+        raise ValueError(f"{path}: expected {m} subsets, found {len(sizes)}")
+    subset_ptr = np.zeros(m + 1, dtype=np.int64)
+    np.cumsum(sizes, out=subset_ptr[1:])
+    subset_elems = np.concatenate(parts).astype(np.intp) - 1
+    return Instance(n, subset_ptr, subset_elems)
+
+
+def cache_path(path):
+    return path + '.cache'
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def load_cache(path, mmap_mode=None):
+    """
+    Load the binary cache of an instance file, or return None if it is missing
+    or stale. mmap_mode is passed to np.load (e.g. 'r' to memory-map the arrays).
+    """
+    directory = cache_path(path)
+    try:
+        with open(os.path.join(directory, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        if meta['source'] != _source_stamp(path):
+            return None
+        arrays = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode=mmap_mode)
+                  for name in CACHE_ARRAYS}
+    except (OSError, ValueError, KeyError):
+        return None
+    return Instance(meta['n'], **arrays)
+
+
+def save_cache(path, instance):
+    """Write the binary cache of an instance file (atomically replaced)."""
+    directory = cache_path(path)
+    tmp = f"{directory}.tmp{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    for name in CACHE_ARRAYS:
+        np.save(os.path.join(tmp, name + '.npy'), getattr(instance, name))
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump({'n': instance.n, 'm': instance.m, 'source': _source_stamp(path)}, f)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp, directory)
+
+
+def build_cache(path, chunk_size=1 << 22):
+    """
+    Write the binary cache of an instance file without holding the incidence
+    in memory: the elements are streamed to disk while parsing, and the
+    element -> subsets transpose is filled chunk by chunk through a
+    memory-mapped output array. Only O(n + m) words are kept in memory.
+    """
+    directory = cache_path(path)
+    tmp = f"{directory}.tmp{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    raw_path = os.path.join(tmp, 'subset_elems.raw')
+
+    # Pass 1: elements to a raw file, subset sizes in memory
+    sizes = []
+    nnz = 0
+    with open(raw_path, 'wb') as raw:
+        for header, chunk_sizes, elems in _scan(path, chunk_size):
+            sizes.append(np.array(chunk_sizes, dtype=np.int64))
+            raw.write((elems - 1).tobytes())
+            nnz += len(elems)
+    n, m = header
+    sizes = np.concatenate(sizes)
+    if len(sizes) != m:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise ValueError(f"{path}: expected {m} subsets, found {len(sizes)}")
+    subset_ptr = np.zeros(m + 1, dtype=np.int64)
+    np.cumsum(sizes, out=subset_ptr[1:])
+    np.save(os.path.join(tmp, 'subset_ptr.npy'), subset_ptr)
+
+    # The raw elements become subset_elems.npy by prepending an .npy header
+    with open(os.path.join(tmp, 'subset_elems.npy'), 'wb') as out, open(raw_path, 'rb') as raw:
+        np.lib.format.write_array_header_1_0(
+            out, {'descr': np.lib.format.dtype_to_descr(np.dtype(np.int64)),
+                  'fortran_order': False, 'shape': (nnz,)})
+        shutil.copyfileobj(raw, out, 1 << 24)
+    os.remove(raw_path)
+    subset_elems = np.load(os.path.join(tmp, 'subset_elems.npy'), mmap_mode='r')
+
+    # Pass 2: element degrees
+    step = max(chunk_size // 8, 1)
+    degree = np.zeros(n, dtype=np.int64)
+    for a in range(0, nnz, step):
+        degree += np.bincount(subset_elems[a:a + step], minlength=n)
+    elem_ptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(degree, out=elem_ptr[1:])
+    np.save(os.path.join(tmp, 'elem_ptr.npy'), elem_ptr)
+
+    # Pass 3: scatter the subset ids into the rows of their elements. Chunks
+    # are visited in subset order, so every row ends up sorted, as with the
+    # in-memory transpose.
+    elem_subsets = np.lib.format.open_memmap(
+        os.path.join(tmp, 'elem_subsets.npy'), mode='w+', dtype=np.int64, shape=(nnz,))
+    cursor = elem_ptr[:-1].copy()
+    for a in range(0, nnz, step):
+        elems = np.asarray(subset_elems[a:a + step])
+        owner = np.searchsorted(subset_ptr, np.arange(a, a + len(elems)), side='right') - 1
+        order = np.argsort(elems, kind='stable')
+        sorted_elems = elems[order]
+        # Rank of every entry among the entries of the same element in the chunk
+        starts = np.flatnonzero(np.r_[True, sorted_elems[1:] != sorted_elems[:-1]])
+        counts = np.diff(np.r_[starts, len(elems)])
+        rank = np.arange(len(elems)) - np.repeat(starts, counts)
+        elem_subsets[cursor[sorted_elems] + rank] = owner[order]
+        cursor[sorted_elems[starts]] += counts
+    elem_subsets.flush()
+    del elem_subsets, subset_elems
+
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump({'n': n, 'm': m, 'source': _source_stamp(path)}, f)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp, directory)
+
+
+def read_instance(path, cache=True, mmap=False):
+    """
+    Read an instance file, going through the binary cache when `cache` is set:
+    a valid cache is loaded instead of parsing, otherwise the file is parsed
+    and the cache (re)written. An unwritable cache location is ignored.
+
+    With `mmap`, the CSR arrays are memory-mapped read-only from the cache
+    (built out of core first if needed), so only the pages touched by the
+    solver are resident. The cache must then be writable.
+    """
+    if mmap:
+        instance = load_cache(path, mmap_mode='r')
+        if instance is None:
+            build_cache(path)
+            instance = load_cache(path, mmap_mode='r')
+        return instance
+    if cache:
+        instance = load_cache(path)
+        if instance is not None:
+            return instance
+    instance = parse_instance(path)
+    if cache:
+        try:
+            save_cache(path, instance)
+        except OSError:
+            pass
+    return instance
@@ -1,8 +1,8 @@
 import matplotlib.pyplot as plt
 import argparse
 import numpy as np
-import os
-import glob
+
+from results import load_runs, load_traces, summary, qrtd, sqd
 
 plt.rcParams.update({
     'font.size': 24,          
@@ -17,72 +17,49 @@ colors = {
     'BnB': 'blue',
     'Approx': 'orange',
     'LS1': 'green',
-    'LS2': 'red'
+    'LS2': 'red',
+    'LS3': 'purple'
 }
 
 marker_styles = {
     'BnB': 'o',
     'Approx': 's',
     'LS1': 'D',
-    'LS2': '^'
+    'LS2': '^',
+    'LS3': 'v'
 }
 
 
-def find_matching_files(inst, alg, cutoff_time, folder='../output'):
-    output_dir = os.path.abspath(folder)
-    full_pattern = os.path.join(output_dir, f"{inst}_{alg}_{cutoff_time}*.trace")
-    matched_files = glob.glob(full_pattern)
-    return matched_files
-
-def load_trace(filename):
-    with open(filename, 'r') as f:
-        return [tuple(map(float, line.strip().split(' '))) for line in f if line.strip()]
-
 def load_opt(filename):
     with open("../data/"+filename+".out", 'r') as f:
         opt = int(f.readline().strip())  
 
     return opt
 
-def evaluate_solutions(solutions, opt):
-    times, collection_sizes, rel_errors = [], [], []
-
-    for sol in solutions:
-        time, value = sol[-1]  
-        times.append(time)
-        collection_sizes.append(value)
-        rel_error = (value - opt) / opt
-        rel_errors.append(rel_error)
-
-    avg_time = round(sum(times) / len(times), 2)
-    avg_rel_error = round(sum(rel_errors) / len(rel_errors), 2)
-    avg_collection_size = round(sum(collection_sizes) / len(collection_sizes), 2)
+def load_solutions(inst, alg, cutoff_time, store=False):
+    """Runs of one algorithm (a results.Runs): from the results store or the .trace files."""
+    if store:
+        return load_runs(inst, alg, cutoff_time)
+    return load_traces(inst, alg, cutoff_time)
 
-    return avg_time, avg_collection_size, avg_rel_error
+def evaluate_solutions(runs, opt):
+    avg_time, avg_collection_size, avg_rel_error = summary(runs, opt)
+    return round(float(avg_time), 2), round(float(avg_collection_size), 2), round(float(avg_rel_error), 2)
 
 def plot_qrtd_sqd_combined(solutions_dict, opt, inst, q_star=0.25, max_time=20):
     fig, (ax_qrtd, ax_sqd) = plt.subplots(1, 2, figsize=(18, 6))
 
     for alg in solutions_dict:
-        solutions = solutions_dict[alg]
+        runs = solutions_dict[alg]
 
         # QRTD
         threshold = opt * (1 + q_star)
-        solve_times = []
-        for run in solutions:
-            for t, val in run:
-                if val <= threshold:
-                    solve_times.append(t)
-                    break
-            else:
-                solve_times.append(float('inf'))
         time_points = np.linspace(0, max_time, 10)
-        y_values = [sum(1 for st in solve_times if st <= t) / len(solutions) for t in time_points]
+        y_values = qrtd(runs, threshold, time_points)
         ax_qrtd.plot(time_points, y_values, color=colors[alg], marker=marker_styles[alg], linewidth=3, markersize=12, label=alg)
 
         # SQD
-        rel_errors = [(run[-1][1] - opt) / opt for run in solutions if run[-1][0] <= max_time]
-        rel_errors.sort()
+        rel_errors = sqd(runs, opt, max_time)
         y_vals = np.linspace(0, 1, len(rel_errors))
         ax_sqd.plot(rel_errors, y_vals, color=colors[alg], marker=marker_styles[alg], linewidth=3, markersize=12, label=alg)
 
@@ -103,7 +80,7 @@ def plot_qrtd_sqd_combined(solutions_dict, opt, inst, q_star=0.25, max_time=20):
 
 def plot_box_all(solutions_dict, inst):
     plt.figure(figsize=(10, 6))
-    data = [[run[-1][0] for run in solutions_dict[alg]] for alg in solutions_dict]
+    data = [solutions_dict[alg].final_time() for alg in solutions_dict]
     bplot = plt.boxplot(data, patch_artist=True, boxprops=dict(linewidth=2),
                         tick_labels=solutions_dict.keys(),
                         medianprops=dict(color='black', linewidth=2))
@@ -121,17 +98,17 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('-inst', required=True, help='Input filename')
     parser.add_argument('-time', required=True, type=float, help='Cutoff time in seconds')
+    parser.add_argument('-store', action='store_true', help='Read the runs from output/<inst>.sqlite instead of the .trace files')
     args = parser.parse_args()
 
     q_value = 0.25
     opt = load_opt(args.inst)
     solutions_dict = {}
 
-    for alg in ['LS1', 'LS2']:
-        solutions = []
-        match_files = find_matching_files(args.inst, alg, args.time)
-        for file in match_files:
-            solutions.append(load_trace(file))
+    for alg in ['LS1', 'LS2', 'LS3']:
+        solutions = load_solutions(args.inst, alg, args.time, args.store)
+        if not len(solutions) and alg == 'LS3':
+            continue  # LS3 runs are optional
         solutions_dict[alg] = solutions
 
         avg_time, avg_collection_size, avg_rel_error = evaluate_solutions(solutions, opt)
@@ -0,0 +1,135 @@
+"""
+portfolio.py
+
+Parallel multi-seed portfolio over the exec.py algorithms.
+
+LS1/LS2/LS3 are run for many seeds (and optionally BnB) on a process pool using
+all cores, under one shared wall-clock cutoff. The workers share the best
+cover size found so far, so BnB prunes against the best local-search result.
+Every run still writes its usual .sol/.trace files, so plots.py keeps working.
+With -target, the first worker to reach the target cancels all the others.
+
+Usage:
+    python portfolio.py -inst <dataset> -time <cutoff> -seeds 1-20 [-algs LS1 LS2 BnB] [-workers N] [-target opt]
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import time
+
+from exec import load_dataset, load_optimum, STRATEGIES
+from presolve import presolve
+import solvers
+from solvers import worker
+from termination import SharedIncumbent
+
+
+def _cancel_at_target(elapsed, size, solution):
+    """Incumbent callback: once one run reaches the target, the others stop too."""
+    target = worker['options'].get('target')
+    if target is not None and size <= target:
+        worker['cancel'].set()
+
+
+def _run(task):
+    inst, alg, cutoff, seed, budget = task
+    remaining = min(worker['deadline'] - time.time(), budget)
+    if remaining <= 0 or worker['cancel'].is_set():
+        return task, None
+
+    # Named after the nominal cutoff so plots.py finds the runs
+    result = solvers.run_and_save(
+        inst, alg, cutoff, seed, worker['instance'], worker['presolved'], worker['store'], budget=remaining,
+        incumbent=worker['incumbent'], cancel=worker['cancel'], callbacks=[_cancel_at_target], **worker['options']
+    )
+    return task, len(result)
+
+
+def parse_seeds(text):
+    """'1-5' -> [1, 2, 3, 4, 5]; '1,4,9' -> [1, 4, 9]"""
+    seeds = []
+    for part in text.split(','):
+        if '-' in part:
+            lo, hi = map(int, part.split('-'))
+            seeds.extend(range(lo, hi + 1))
+        else:
+            seeds.append(int(part))
+    return seeds
+
+
+def run_portfolio(inst, algs, cutoff, seeds, workers=None, use_presolve=False, options=None, store=False):
+    """
+    Run every (alg, seed) pair of the portfolio under one wall-clock cutoff.
+    BnB is deterministic and runs once. Returns {(alg, seed): cover size}, with
+    None for runs that did not start before the cutoff (or the target).
+    options: settings passed on to exec.run_algorithm (bound, strategy,
+    max_nodes, target, stall).
+    store: also add every run to the results store of the instance (results.py).
+    """
+    start = time.time()
+    instance = load_dataset(inst)
+    presolved = None
+    if use_presolve:
+        presolved = presolve(instance)
+        instance = presolved.instance
+        options = dict(options or {})
+        if options.get('target') is not None:
+            options['target'] -= len(presolved.fixed)  # added back to every cover
+
+    workers = workers or os.cpu_count() or 1
+    ls_runs = [(alg, seed) for alg in algs if alg != 'BnB' for seed in seeds]
+
+    # BnB gets a worker for the whole cutoff and prunes with the LS incumbents.
+    # With more LS runs than the remaining workers, the runs go in waves that
+    # split the cutoff evenly.
+    tasks = []
+    if 'BnB' in algs:
+        tasks.append((inst, 'BnB', cutoff, seeds[0], cutoff))
+    ls_workers = max(workers - len(tasks), 1)
+    waves = max(-(-len(ls_runs) // ls_workers), 1)
+    for alg, seed in ls_runs:
+        tasks.append((inst, alg, cutoff, seed, cutoff / waves))
+
+    incumbent = SharedIncumbent()
+    cancel = mp.Event()
+    results = {}
+    state = {'instance': instance, 'presolved': presolved, 'incumbent': incumbent, 'deadline': start + cutoff,
+             'options': options or {}, 'cancel': cancel, 'store': store}
+    with mp.Pool(workers, initializer=solvers.init_worker, initargs=(state,)) as pool:
+        for (_, alg, _, seed, _), size in pool.imap_unordered(_run, tasks):
+            results[(alg, seed)] = size
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-inst', required=True, help='Input filename')
+    parser.add_argument('-time', required=True, type=float, help='Shared wall-clock cutoff in seconds')
+    parser.add_argument('-seeds', required=True, help="Seeds, e.g. '1-20' or '1,3,5'")
+    parser.add_argument('-algs', nargs='+', default=['LS1', 'LS2'], choices=[a for a in solvers.names() if a != 'Approx'])
+    parser.add_argument('-workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('-presolve', action='store_true', help='Reduce the instance before solving')
+    parser.add_argument('-bound', default='tiered', choices=['tiered', 'lp'], help='BnB bounding mode')
+    parser.add_argument('-strategy', default='dfs', choices=STRATEGIES, help='BnB node ordering')
+    parser.add_argument('-target', help="Stop all runs once a cover of at most this size is found ('opt': the .out optimum)")
+    parser.add_argument('-stall', type=float, help='Stop a run after this many seconds without a better cover')
+    parser.add_argument('-store', action='store_true', help='Also add the runs to the results store output/<inst>.sqlite')
+    args = parser.parse_args()
+
+    target = None
+    if args.target is not None:
+        target = load_optimum(args.inst) if args.target == 'opt' else int(args.target)
+    results = run_portfolio(args.inst, args.algs, args.time, parse_seeds(args.seeds),
+                            args.workers, args.presolve,
+                            {'bound': args.bound, 'strategy': args.strategy, 'target': target, 'stall': args.stall},
+                            args.store)
+    finished = {k: v for k, v in results.items() if v is not None}
+    for (alg, seed), size in sorted(finished.items()):
+        print(f"{alg} seed {seed}: {size}")
+    if finished:
+        print(f"Best: {min(finished.values())} ({len(finished)}/{len(results)} runs finished)")
+
+
+if __name__ == "__main__":
+    main()
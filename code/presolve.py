@@ -0,0 +1,115 @@
+"""
+presolve.py
+
+Instance reduction run by exec.py before any solver. The following rules are
+applied repeatedly until none of them changes the instance:
+
+    forced subsets     an element covered by exactly one subset forces that
+                       subset into every cover; it is fixed and its elements
+                       are removed from the universe
+    empty subsets      subsets that no longer cover anything are dropped
+    duplicate subsets  identical subsets are merged into the lowest index
+    dominated subsets  S_i is dropped when S_i is a proper subset of some S_j
+                       (all subsets cost the same, so S_j is never worse)
+
+Exports:
+    presolve(instance) -> Presolved
+"""
+
+import numpy as np
+
+from instance import Instance
+
+
+class Presolved:
+    """
+    Result of presolve.
+
+    Attributes:
+        instance (Instance): the reduced instance
+        kept (np.ndarray): original index of every subset of the reduced instance
+        fixed (list): original indices of the subsets forced into the cover
+        original (Instance): the instance before reduction
+    """
+
+    def __init__(self, instance, kept, fixed, original):
+        self.instance = instance
+        self.kept = kept
+        self.fixed = fixed
+        self.original = original
+
+    def expand(self, solution):
+        """Map a cover of the reduced instance to a cover of the original one (0-based)."""
+        return self.fixed + [int(self.kept[j]) for j in solution]
+
+    def expand_trace(self, trace):
+        """Shift the cover sizes of a (time, size) trace by the number of fixed subsets."""
+        return [(t, size + len(self.fixed)) for t, size in trace]
+
+    def summary(self):
+        return (f"Presolve: {len(self.fixed)} subsets fixed, "
+                f"m {self.original.m} -> {self.instance.m}, n {self.original.n} -> {self.instance.n}")
+
+
+def presolve(instance):
+    """
+    Reduce the instance until nothing changes. Raises ValueError if some
+    element is not covered by any subset.
+    """
+    rows = {j: set(instance.elements(j).tolist()) for j in range(instance.m)}
+    owners = {e: set(instance.subsets_of(e).tolist()) for e in range(instance.n)}
+    fixed = []
+
+    def drop(j):
+        for e in rows.pop(j):
+            owners[e].discard(j)
+
+    changed = True
+    while changed:
+        changed = False
+
+        # Forced subsets
+        for e in list(owners):
+            if e not in owners:
+                continue
+            if not owners[e]:
+                raise ValueError(f"Element {e + 1} is not covered by any subset")
+            if len(owners[e]) == 1:
+                j = next(iter(owners[e]))
+                fixed.append(j)
+                for f in rows.pop(j):
+                    for k in owners.pop(f):
+                        if k != j:
+                            rows[k].discard(f)
+                changed = True
+
+        # Empty, duplicate and dominated subsets
+        for j in sorted(rows):
+            row = rows[j]
+            if not row:
+                del rows[j]
+                changed = True
+                continue
+            # Subsets containing every element of S_j, rarest element first
+            elems = sorted(row, key=lambda e: len(owners[e]))
+            supersets = set(owners[elems[0]])
+            for e in elems[1:]:
+                supersets &= owners[e]
+                if len(supersets) == 1:
+                    break
+            supersets.discard(j)
+            if any(len(rows[k]) > len(row) or k < j for k in supersets):
+                drop(j)
+                changed = True
+
+    # Relabel the remaining elements and subsets in their original order
+    kept = np.array(sorted(rows), dtype=np.intp)
+    label = {e: i for i, e in enumerate(sorted(owners))}
+    sizes = [len(rows[j]) for j in kept]
+    subset_ptr = np.zeros(len(kept) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=subset_ptr[1:])
+    subset_elems = np.fromiter(
+        (label[e] for j in kept for e in sorted(rows[j])), dtype=np.intp, count=int(subset_ptr[-1])
+    )
+    reduced = Instance(len(label), subset_ptr, subset_elems)
+    return Presolved(reduced, kept, fixed, instance)
@@ -0,0 +1,224 @@
+"""
+results.py
+
+Columnar results store and vectorized run analysis.
+
+Each instance gets one SQLite file, output/<inst>.sqlite, with one row per
+run: (alg, cutoff, seed) as key, the final size and time, and the trace as two
+binary columns (float64 times, int64 sizes). Rerunning a configuration
+replaces its row, like rewriting its .trace file. SQLite takes care of
+concurrent appends from batch.py/portfolio.py workers.
+
+A set of runs is loaded as a Runs object: the trace points of all runs
+concatenated into flat arrays with run offsets (CSR, like instance.Instance),
+so the analysis is a few array operations over any number of runs:
+
+    summary(runs, opt)            mean final time, size and relative error
+    solve_times(runs, threshold)  first time each run reaches the threshold
+    qrtd(runs, threshold, times)  fraction of runs solved at each time point
+    sqd(runs, opt, max_time)      sorted relative errors of the final covers
+
+The per-run .trace files stay the primary output; runs can be loaded from
+either source, and existing traces can be imported:
+
+    python results.py -inst large1 [-folder ../output]
+
+Exports:
+    Runs, store_path, append_run, load_runs, load_traces, import_traces,
+    summary, solve_times, qrtd, sqd
+"""
+
+import argparse
+import glob
+import os
+import re
+import sqlite3
+import time
+
+import numpy as np
+
+OUTPUT_DIR = "../output"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    alg     TEXT    NOT NULL,
+    cutoff  REAL    NOT NULL,
+    seed    INTEGER NOT NULL,
+    size    INTEGER NOT NULL,
+    time    REAL    NOT NULL,
+    times   BLOB    NOT NULL,
+    sizes   BLOB    NOT NULL,
+    created REAL    NOT NULL,
+    PRIMARY KEY (alg, cutoff, seed)
+)
+"""
+
+
+class Runs:
+    """
+    Traces of several runs in flat arrays: the points of run r are
+    time[ptr[r]:ptr[r+1]] and size[ptr[r]:ptr[r+1]], in time order.
+    seed holds the seed of every run.
+    """
+
+    def __init__(self, ptr, time, size, seed):
+        self.ptr = np.asarray(ptr, dtype=np.int64)
+        self.time = np.asarray(time, dtype=np.float64)
+        self.size = np.asarray(size, dtype=np.int64)
+        self.seed = np.asarray(seed, dtype=np.int64)
+
+    @classmethod
+    def from_traces(cls, traces, seeds=None):
+        """From a list of [(time, size), ...] traces."""
+        lengths = [len(t) for t in traces]
+        ptr = np.zeros(len(traces) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=ptr[1:])
+        points = np.array([p for t in traces for p in t], dtype=np.float64).reshape(-1, 2)
+        if seeds is None:
+            seeds = np.zeros(len(traces), dtype=np.int64)
+        return cls(ptr, points[:, 0], points[:, 1], seeds)
+
+    def __len__(self):
+        return len(self.ptr) - 1
+
+    def final_time(self):
+        return self.time[self.ptr[1:] - 1]
+
+    def final_size(self):
+        return self.size[self.ptr[1:] - 1]
+
+
+def store_path(inst, folder=OUTPUT_DIR):
+    return os.path.join(folder, f"{inst}.sqlite")
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=60)
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def append_run(inst, alg, cutoff, seed, trace, folder=OUTPUT_DIR):
+    """Add the (time, size) trace of a run to the store of its instance (replacing a rerun)."""
+    points = np.asarray(trace, dtype=np.float64).reshape(-1, 2)
+    times = points[:, 0].copy()
+    sizes = points[:, 1].astype(np.int64)
+    conn = _connect(store_path(inst, folder))
+    try:
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (alg, float(cutoff), int(seed), int(sizes[-1]), float(times[-1]),
+                          times.tobytes(), sizes.tobytes(), time.time()))
+    finally:
+        conn.close()
+
+
+def load_runs(inst, alg, cutoff, folder=OUTPUT_DIR):
+    """All stored runs of (alg, cutoff) on an instance, in seed order."""
+    path = store_path(inst, folder)
+    if not os.path.exists(path):
+        return Runs.from_traces([])
+    conn = _connect(path)
+    try:
+        rows = conn.execute("SELECT seed, times, sizes FROM runs WHERE alg = ? AND cutoff = ? ORDER BY seed",
+                            (alg, float(cutoff))).fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        return Runs.from_traces([])
+    seeds, times, sizes = zip(*rows)
+    time_arr = np.frombuffer(b"".join(times), dtype=np.float64)
+    size_arr = np.frombuffer(b"".join(sizes), dtype=np.int64)
+    ptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(t) // 8 for t in times], out=ptr[1:])
+    return Runs(ptr, time_arr, size_arr, seeds)
+
+
+def _trace_files(inst, alg, cutoff, folder):
+    """The .trace files of (alg, cutoff) with their seeds (0 for the seedless algorithms)."""
+    pattern = os.path.join(os.path.abspath(folder), f"{inst}_{alg}_{float(cutoff)}*.trace")
+    name = re.compile(re.escape(f"{inst}_{alg}_{float(cutoff)}") + r"(?:_(\d+))?\.trace$")
+    found = []
+    for path in glob.glob(pattern):
+        match = name.search(os.path.basename(path))
+        if match:
+            found.append((int(match.group(1) or 0), path))
+    return sorted(found)
+
+
+def load_traces(inst, alg, cutoff, folder=OUTPUT_DIR):
+    """Runs of (alg, cutoff) read from the per-run .trace files."""
+    seeds, traces = [], []
+    for seed, path in _trace_files(inst, alg, cutoff, folder):
+        points = np.loadtxt(path, dtype=np.float64, ndmin=2)
+        if len(points):
+            seeds.append(seed)
+            traces.append(points)
+    if not traces:
+        return Runs.from_traces([])
+    ptr = np.zeros(len(traces) + 1, dtype=np.int64)
+    np.cumsum([len(t) for t in traces], out=ptr[1:])
+    points = np.concatenate(traces)
+    return Runs(ptr, points[:, 0], points[:, 1], seeds)
+
+
+def import_traces(inst, folder=OUTPUT_DIR):
+    """Copy every .trace file of an instance into its store. Returns the number of runs."""
+    name = re.compile("^" + re.escape(inst) + r"_(\w+?)_(\d+(?:\.\d+)?)(?:_(\d+))?\.trace$")
+    imported = 0
+    for path in sorted(glob.glob(os.path.join(folder, f"{inst}_*.trace"))):
+        match = name.search(os.path.basename(path))
+        if not match:
+            continue
+        points = np.loadtxt(path, dtype=np.float64, ndmin=2)
+        if len(points):
+            alg, cutoff, seed = match.group(1), float(match.group(2)), int(match.group(3) or 0)
+            append_run(inst, alg, cutoff, seed, points, folder)
+            imported += 1
+    return imported
+
+
+def summary(runs, opt):
+    """Mean final time, mean final size and mean relative error of the runs."""
+    final_time, final_size = runs.final_time(), runs.final_size()
+    rel_error = (final_size - opt) / opt
+    return final_time.mean(), final_size.mean(), rel_error.mean()
+
+
+def solve_times(runs, threshold):
+    """First time each run has a cover of at most `threshold` subsets (inf if never)."""
+    if not len(runs):
+        return np.zeros(0)
+    hit = np.where(runs.size <= threshold, runs.time, np.inf)
+    # Traces are in time order, so the earliest hit is the minimum per run
+    first = np.full(len(runs), np.inf)
+    nonempty = runs.ptr[1:] > runs.ptr[:-1]
+    first[nonempty] = np.minimum.reduceat(hit, runs.ptr[:-1][nonempty])
+    return first
+
+
+def qrtd(runs, threshold, time_points):
+    """Fraction of the runs that reached `threshold` by each of the time points."""
+    solved = np.sort(solve_times(runs, threshold))
+    if not len(solved):
+        return np.zeros(len(time_points))
+    return np.searchsorted(solved, time_points, side='right') / len(solved)
+
+
+def sqd(runs, opt, max_time=np.inf):
+    """Sorted relative errors of the final covers of the runs that ended by max_time."""
+    ended = runs.final_time() <= max_time
+    return np.sort((runs.final_size()[ended] - opt) / opt)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-inst', required=True, help='Instance whose .trace files are imported into its store')
+    parser.add_argument('-folder', default=OUTPUT_DIR, help='Folder of the .trace files and the store')
+    args = parser.parse_args()
+    count = import_traces(args.inst, args.folder)
+    print(f"Imported {count} runs into {store_path(args.inst, args.folder)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+solvers.py
+
+Registry of the algorithms behind -alg (exec.py, batch.py, portfolio.py,
+bench.py, daemon.py).
+
+Every algorithm is registered with the module that implements it and a
+runner that calls into that module. The module is imported only when the
+algorithm is run, so `-alg Approx` never pays for SciPy (imported by BnB),
+and importing this registry costs nothing beyond the standard library.
+
+A runner is called as runner(module, instance, cutoff, seed, termination,
+stats, options) and returns (result, trace): the 0-based subset indices of
+the cover and the (time, size) trace. options holds the solver settings of
+exec.run_algorithm (bound, strategy, max_nodes, schedule, workers, incumbent,
+verbose, initial). A new algorithm registers itself without touching exec.py:
+
+    @register('LS4', 'LS4', seeded=True)
+    def _ls4(LS4, instance, cutoff, seed, termination, stats, options):
+        return LS4.search(instance, cutoff, termination, stats)
+
+Algorithms registered outside this file are found through $SETCOVER_SOLVERS,
+a comma-separated list of modules imported on first lookup.
+
+The process pools of batch.py and portfolio.py share their worker side:
+init_worker stores the per-process state in `worker`, and run_and_save runs
+one task and writes its output files.
+
+Exports:
+    Solver, register, get, names, seeded, worker, init_worker, run_and_save
+"""
+
+import importlib
+import os
+
+
+class Solver:
+    """
+    name:   the -alg name
+    module: module implementing the algorithm, imported by load()
+    seeded: whether runs depend on the seed (the seed is then part of the
+            output file names and several seeds are run by batch/portfolio)
+    runner: see the module docstring
+    """
+
+    def __init__(self, name, module, runner, seeded=False):
+        self.name = name
+        self.module = module
+        self.runner = runner
+        self.seeded = seeded
+
+    def load(self):
+        return importlib.import_module(self.module)
+
+    def run(self, instance, cutoff, seed, termination, stats=None, options=None, module=None):
+        """module: the module returned by load(), which is otherwise imported here (inside the cutoff)."""
+        if module is None:
+            module = self.load()
+        return self.runner(module, instance, cutoff, seed, termination, stats, options or {})
+
+
+_registry = {}
+_plugins_loaded = False
+
+
+def register(name, module, seeded=False):
+    """Decorator registering a runner as algorithm `name` (replacing an earlier one of that name)."""
+    def decorate(runner):
+        _registry[name] = Solver(name, module, runner, seeded)
+        return runner
+    return decorate
+
+
+def _load_plugins():
+    global _plugins_loaded
+    if not _plugins_loaded:
+        _plugins_loaded = True
+        for module in filter(None, os.environ.get('SETCOVER_SOLVERS', '').split(',')):
+            importlib.import_module(module.strip())
+
+
+def get(name):
+    _load_plugins()
+    try:
+        return _registry[name]
+    except KeyError:
+        raise ValueError(f"Algorithm '{name}' is not registered (see solvers.py)") from None
+
+
+def names():
+    _load_plugins()
+    return list(_registry)
+
+
+def seeded(name):
+    return get(name).seeded
+
+
+# Pool workers (batch.py, portfolio.py)
+
+worker = {}  # per-process state, set by init_worker
+
+
+def init_worker(state):
+    """Pool initializer: keep the state dict (instances, shared incumbent, ...) of this worker."""
+    worker.update(state)
+
+
+def run_and_save(inst, alg, cutoff, seed, instance, presolved=None, store=False, budget=None, **options):
+    """
+    Run one task in a pool worker and write its .sol/.trace files, named after
+    the nominal cutoff (budget: the time the run actually gets, default the
+    cutoff). presolved: the Presolved the instance came from, whose fixed
+    subsets are added back. options go to exec.run_algorithm. Returns the cover.
+    """
+    from exec import run_algorithm, save_dataset, solution_name, store_trace
+
+    result, trace = run_algorithm(instance, alg, cutoff if budget is None else budget, seed, **options)
+    if presolved is not None:
+        result = presolved.expand(result)
+        trace = presolved.expand_trace(trace)
+    save_dataset(solution_name(inst, alg, cutoff, seed), result, trace)
+    if store:
+        store_trace(inst, alg, cutoff, seed, trace)
+    return result
+
+
+@register('BnB', 'BnB')
+def _bnb(BnB, instance, cutoff, seed, termination, stats, options):
+    bound = options.get('bound', 'tiered')
+    incumbent = options.get('incumbent')
+    initial = options.get('initial')
+    if options.get('workers', 1) > 1:
+        solver = BnB.ParallelBranchAndBound(instance, cutoff, bound, options['workers'], incumbent, termination,
+                                            initial=initial, timed=stats is not None)
+    else:
+        solver = BnB.BranchAndBound(instance, cutoff, bound, options.get('strategy', 'dfs'),
+                                    options.get('max_nodes', 100000), incumbent, termination, initial,
+                                    timed=stats is not None)
+    result, trace = solver.run()
+    if options.get('verbose'):
+        print(solver.report())
+    if stats is not None:
+        stats.update(solver.statistics())
+    return result, trace
+
+
+@register('Approx', 'Approx')
+def _approx(Approx, instance, cutoff, seed, termination, stats, options):
+    result, time_spent = Approx.greedy_set_cover(instance, stats)
+    termination.complete()
+    return result, [(time_spent, len(result))]  # Approx has no trace of its own
+
+
+@register('LS1', 'LS1', seeded=True)
+def _ls1(LS1, instance, cutoff, seed, termination, stats, options):
+    return LS1.simulated_annealing(instance, cutoff, seed=seed, termination=termination, stats=stats,
+                                   schedule=options.get('schedule', 'geometric'), initial=options.get('initial'))
+
+
+@register('LS2', 'LS2', seeded=True)
+def _ls2(LS2, instance, cutoff, seed, termination, stats, options):
+    return LS2.hill_climbing_min_set_cover(instance, cutoff, termination, stats, options.get('initial'))
+
+
+@register('LS3', 'LS3', seeded=True)
+def _ls3(LS3, instance, cutoff, seed, termination, stats, options):
+    return LS3.weighted_local_search(instance, cutoff, termination, stats, options.get('initial'))
@@ -0,0 +1,127 @@
+"""
+termination.py
+
+Anytime termination and incumbent reporting shared by the solvers.
+
+A solver asks stop() before every iteration instead of comparing time.time()
+with its cutoff, and reports every new best cover with improve() instead of
+appending to its own trace list. A run then ends at the first of:
+
+    cutoff   the time budget is used up
+    target   a cover of at most `target` subsets was found (e.g. the .out
+             optimum, or a bound given by the user)
+    stall    no better cover for `stall` seconds
+    cancel   an external event was set (threading.Event, multiprocessing.Event
+             or anything with is_set()), e.g. by another worker that already
+             reached the target
+
+stop() also ends a search its solver has finished (complete()) or cannot
+finish (fail(), e.g. a parallel BnB worker died), so reason always tells why
+a run ended.
+
+Callbacks are called as callback(elapsed, size, solution) on every new
+incumbent; the (elapsed, size) trace of the .trace files is kept here. The
+solution may be the solver's working list: copy it to keep it.
+
+SharedIncumbent holds the best cover size of several processes (portfolio.py,
+parallel BnB) in shared memory.
+
+Exports:
+    Termination, SharedIncumbent, REASONS
+"""
+
+import multiprocessing as mp
+import time
+
+REASONS = ('cutoff', 'target', 'stall', 'cancel', 'complete', 'failed')
+
+
+class Termination:
+    """
+    cutoff:    time budget in seconds
+    target:    stop once a cover of at most this size is found (None: no target)
+    stall:     stop after this many seconds without a better cover (None: never)
+    cancel:    optional event; the run stops once it is set
+    callbacks: callables called as callback(elapsed, size, solution) on every
+               new incumbent
+
+    The clock starts when the object is created.
+    """
+
+    def __init__(self, cutoff, target=None, stall=None, cancel=None, callbacks=()):
+        self.cutoff = cutoff
+        self.target = target
+        self.stall = stall
+        self.cancel = cancel
+        self.callbacks = list(callbacks)
+
+        self.start = time.time()
+        self.last_improvement = self.start
+        self.best = float('inf')
+        self.trace = []  # (elapsed_sec, cover_size)
+        self.reason = None
+
+    def elapsed(self):
+        return time.time() - self.start
+
+    def remaining(self):
+        return self.cutoff - self.elapsed()
+
+    def stop(self):
+        """True once the run should end; the first reason found is kept in self.reason."""
+        if self.reason is not None:
+            return True
+        now = time.time()
+        if now - self.start >= self.cutoff:
+            self.reason = 'cutoff'
+        elif self.stall is not None and now - self.last_improvement >= self.stall:
+            self.reason = 'stall'
+        elif self.cancel is not None and self.cancel.is_set():
+            self.reason = 'cancel'
+        return self.reason is not None
+
+    def improve(self, size, solution=None):
+        """
+        Report a cover of `size` subsets. Returns True if it is a new best, in
+        which case it is traced and passed to the callbacks.
+        """
+        if size >= self.best:
+            return False
+        self.best = size
+        self.last_improvement = now = time.time()
+        elapsed = now - self.start
+        self.trace.append((round(elapsed, 2), size))
+        for callback in self.callbacks:
+            callback(elapsed, size, solution)
+        if self.target is not None and size <= self.target:
+            self.reason = 'target'
+        return True
+
+    def complete(self):
+        """The solver has finished its search (e.g. BnB proved optimality)."""
+        if self.reason is None:
+            self.reason = 'complete'
+
+    def fail(self):
+        """The solver cannot go on (e.g. a worker process died); it returns its best cover so far."""
+        if self.reason is None:
+            self.reason = 'failed'
+
+    def statistics(self):
+        return {'stop_reason': self.reason, 'time_to_best': self.trace[-1][0] if self.trace else None}
+
+
+class SharedIncumbent:
+    """Best cover size found by any worker, in shared memory."""
+
+    def __init__(self, size=2**31 - 1):
+        self._value = mp.Value('i', size)
+
+    @property
+    def value(self):
+        return self._value.value
+
+    def offer(self, size):
+        with self._value.get_lock():
+            if size < self._value.value:
+                self._value.value = size